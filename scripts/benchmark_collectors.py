@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+
+import sys
+import timeit
+from pathlib import Path
+
+from archlint.collection import collect_file_objects, collect_file_objects_ast
+
+
+def make_large_source(n_classes: int, n_methods: int) -> str:
+    method = (
+        "    @property\n"
+        "    def method_{j}(self, value: int = 0) -> int:\n"
+        '        """Docstring with a colon: and some text."""\n'
+        "        result = {{'key': value}}\n"
+        "        return result['key'] + {j}\n"
+    )
+    classes = [
+        f"class Class{i}(Base{i}, Generic[T]):\n"
+        + "\n".join(method.format(j=j) for j in range(n_methods))
+        for i in range(n_classes)
+    ]
+    functions = [f"def function_{i}(x):\n    return x\n" for i in range(n_classes)]
+    return "import re\n\n\n" + "\n\n".join(classes + functions) + "\n"
+
+
+def benchmark_collectors(n_classes: int = 200, n_methods: int = 60, repeat: int = 5) -> None:
+    source = make_large_source(n_classes, n_methods)
+    p = Path("module.py")
+    print(f"{len(source.splitlines())} lines, {n_classes} classes, {n_methods} methods each")
+
+    timings = {}
+    for name, collector in (("regex", collect_file_objects), ("ast", collect_file_objects_ast)):
+        timings[name] = min(
+            timeit.repeat(lambda c=collector: c(source, p), number=1, repeat=repeat)
+        )
+        print(f"    {name:<6} {timings[name] * 1000:9.1f} ms")
+
+    print(f"    ast/regex {timings['ast'] / timings['regex']:.2f}x")
+
+
+if __name__ == "__main__":
+    sys.exit(benchmark_collectors(*map(int, sys.argv[1:])))
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+
+import random
+import re
+import sys
+import timeit
+
+import grimp
+
+from archlint.utils import ModuleTrie
+
+N_PACKAGES = 500
+N_EXTERNALS = 50
+
+
+def make_substring_pattern(substrings: set[str]) -> re.Pattern:
+    # the substring matching that ModuleTrie replaced, kept here for comparison
+    alternatives = sorted(substrings, key=len, reverse=True)
+    return re.compile("|".join(map(re.escape, alternatives)))
+
+
+def make_synthetic_graph(n_modules: int, n_imports: int, seed: int = 0) -> grimp.ImportGraph:
+    rng = random.Random(seed)
+    graph = grimp.ImportGraph()
+    modules = [f"pkg.sub{i % N_PACKAGES}.mod{i}" for i in range(n_modules)]
+    externals = [f"ext{i}" for i in range(N_EXTERNALS)]
+    for name in modules:
+        graph.add_module(name)
+    for name in externals:
+        graph.add_module(name, is_squashed=True)
+    for i, importer in enumerate(modules[1:], start=1):
+        for imported in rng.sample(modules[:i], min(i, n_imports)):
+            graph.add_import(importer=importer, imported=imported)
+        graph.add_import(importer=importer, imported=rng.choice(externals))
+    return graph
+
+
+def benchmark_import_rules(
+    n_modules: int = 10_000, n_rules: int = 100, n_configured: int = 50, repeat: int = 5
+) -> None:
+    rng = random.Random(1)
+    graph = make_synthetic_graph(n_modules, 3)
+    internal = sorted(m for m in graph.modules if m.startswith("pkg."))
+    configured = rng.sample(internal, n_configured)
+    rules = {
+        m: {f"pkg.sub{j}" for j in rng.sample(range(N_PACKAGES), n_rules)} | {m} for m in configured
+    }
+    upstream = {m: graph.find_upstream_modules(m) for m in configured}
+    print(f"{n_modules} modules, {n_configured} configured modules, {n_rules} rules each")
+    print(f"    {sum(map(len, upstream.values()))} upstream modules to classify")
+
+    def compile_substring() -> None:
+        for names in rules.values():
+            make_substring_pattern(names)
+
+    def compile_trie() -> None:
+        for names in rules.values():
+            "" in ModuleTrie(names)
+
+    compile_substring()
+    patterns = {m: make_substring_pattern(names).search for m, names in rules.items()}
+    tries = {m: ModuleTrie(names) for m, names in rules.items()}
+
+    def classify_substring() -> dict[str, set[str]]:
+        return {m: {u for u in upstream[m] if not patterns[m](u)} for m in configured}
+
+    def classify_trie() -> dict[str, set[str]]:
+        return {m: tries[m].reject(upstream[m]) for m in configured}
+
+    timings = {}
+    for name, func in (
+        ("compile substring", compile_substring),
+        ("compile trie", compile_trie),
+        ("classify substring", classify_substring),
+        ("classify trie", classify_trie),
+    ):
+        timings[name] = min(timeit.repeat(func, number=1, repeat=repeat))
+        print(f"    {name:<20} {timings[name] * 1000:9.2f} ms")
+
+    ratio = timings["classify substring"] / timings["classify trie"]
+    missed = sum(len(classify_trie()[m] - classify_substring()[m]) for m in configured)
+    print(f"    classify substring/trie {ratio:.2f}x")
+    print(f"    violations hidden by substring matching: {missed}")
+
+
+if __name__ == "__main__":
+    sys.exit(benchmark_import_rules(*map(int, sys.argv[1:])))
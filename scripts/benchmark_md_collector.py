@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+
+import re
+import sys
+import timeit
+
+from archlint.collection import collect_objects_in_md
+from archlint.regexes import Regex
+
+
+def make_large_docs(n_pages: int, n_objects: int, n_prose_lines: int) -> str:
+    prose = (
+        "Some reference prose with `code`, # hashes, [links](https://example.com) and a table:\n"
+        "| option | default | meaning |\n"
+        "|--------|---------|---------|\n"
+    )
+    block = (
+        "## ::: package.module_{i}.Object{j}\n"
+        "    handler: python\n"
+        "    options:\n"
+        "        show_root_heading: true\n\n"
+    )
+    pages = [
+        f"# package.module_{i}\n\n"
+        + prose * (n_prose_lines // 3)
+        + "".join(block.format(i=i, j=j) for j in range(n_objects))
+        for i in range(n_pages)
+    ]
+    return "\n".join(pages)
+
+
+def benchmark_md_collector(
+    n_pages: int = 40, n_objects: int = 50, n_prose_lines: int = 1500, repeat: int = 5
+) -> None:
+    text = make_large_docs(n_pages, n_objects, n_prose_lines)
+    print(
+        f"{len(text) / 1e6:.1f} MB, {len(text.splitlines())} lines, {n_pages * n_objects} objects"
+    )
+
+    def full_scan() -> list[tuple[int, str]]:
+        return list(enumerate(re.findall(Regex.OBJECT_IN_MD, text)))
+
+    assert collect_objects_in_md(text) == full_scan()
+    timings = {}
+    for name, collector in (("full", full_scan), ("headings", lambda: collect_objects_in_md(text))):
+        timings[name] = min(timeit.repeat(collector, number=1, repeat=repeat))
+        print(f"    {name:<9} {timings[name] * 1000:9.1f} ms")
+
+    print(f"    full/headings {timings['full'] / timings['headings']:.2f}x")
+
+
+if __name__ == "__main__":
+    sys.exit(benchmark_md_collector(*map(int, sys.argv[1:])))
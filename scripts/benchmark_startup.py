@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+
+import re
+import subprocess
+import sys
+
+# cold-start import budget for `archlint methods`, about twice the typical time
+METHODS_STARTUP_BUDGET_US = 300_000
+
+
+def measure_import_times() -> dict[str, int]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "archlint", "methods"],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    return {
+        name: int(cumulative)
+        for cumulative, name in re.findall(r"import time: +\d+ \| +(\d+) \| +(\S+)", result.stderr)
+    }
+
+
+def benchmark_startup(repeat: int = 5) -> int:
+    runs = [measure_import_times() for _ in range(repeat)]
+    best = min(run["archlint.cli"] for run in runs)
+    print(
+        f"    archlint.cli {best / 1000:9.1f} ms (budget {METHODS_STARTUP_BUDGET_US / 1000:.0f} ms)"
+    )
+    for name in ("grimp", "concurrent.futures.process", "archlint.daemon"):
+        if any(name in run for run in runs):
+            print(f"    {name} is imported by 'archlint methods'")
+
+    return int(best >= METHODS_STARTUP_BUDGET_US)
+
+
+if __name__ == "__main__":
+    sys.exit(benchmark_startup(*map(int, sys.argv[1:])))
@@ -1,94 +1,169 @@
+from collections.abc import Generator
 from functools import partial
+from pathlib import Path
 
 from archlint.logic import sort_methods
-from archlint.utils import deduplicate_ordered, make_double_bar, sort_on_path
+from archlint.utils import deduplicate_ordered
 
-from .collection import Objects
-from .configuration import Configuration
+from .collection import Project
 from .logic import (
+    Discrepancies,
+    SetDict,
     analyze_discrepancies,
+    build_import_graph,
+    find_affected_paths,
+    find_import_chains,
     get_disallowed_imports,
     map_to_doc,
     map_to_test,
+    sort_on_path,
 )
 from .reporting import (
+    Violation,
+    iter_discrepancy_violations,
+    iter_import_violations,
+    iter_method_violations,
     make_discrepancy_report,
     make_imports_report,
     make_methods_report,
 )
 
+Chains = dict[tuple[str, str], tuple[str, ...]]
 
-def check_method_order(cfg: Configuration, source_objects: Objects) -> tuple[str, bool]:
-    make_double_bar(" METHOD ORDER ")
 
+def find_method_order_problems(project: Project) -> list[tuple[Path, str, list[str], list[str]]]:
+    cfg = project.cfg
     out_of_order = []
-    classes = source_objects.classes
+    classes = project.source.classes
+    if project.changed is not None:
+        classes = [c for c in classes if c.path in project.changed]
 
-    for path, _, classname, methods, method_dict, __ in classes:
-        sorted_methods = sort_methods(method_dict, cfg.method_order)
-        if methods != sorted_methods:
-            out_of_order.append((path, classname, methods, sorted_methods))
+    for c in classes:
+        own_methods = list(c.method_dict)
+        sorted_methods = sort_methods(c.method_dict, cfg.method_order)
+        if own_methods != sorted_methods:
+            out_of_order.append((c.path, c.name, own_methods, sorted_methods))
 
+    return out_of_order
+
+
+def check_method_order(project: Project) -> tuple[str, bool]:
+    out_of_order = find_method_order_problems(project)
     return make_methods_report(out_of_order), bool(out_of_order)
 
 
-def check_docs_structure(
-    cfg: Configuration, source_objects: Objects, docs_objects: Objects
-) -> tuple[str, bool]:
-    actual: list[str] = sort_on_path(docs_objects.strings)
-    duplicated = source_objects.apply(
-        partial(map_to_doc, cfg=cfg), cfg.docs.ignore, include_methodless=True
-    )
-    expected: list[str] = sort_on_path(deduplicate_ordered(duplicated))
-    missing, unexpected, overlap = analyze_discrepancies(
-        actual, expected, allow_additional=cfg.docs.allow_additional
+def find_docs_discrepancies(project: Project) -> Discrepancies:
+    cfg = project.cfg
+    processor = partial(map_to_doc, cfg=cfg)
+    actual = sort_on_path(project.docs.records)
+    duplicated = project.source.apply(processor, cfg.docs.ignore, include_methodless=True)
+    expected = sort_on_path(deduplicate_ordered(duplicated))
+    if project.changed is not None:
+        affected = find_affected_paths(
+            cfg,
+            project.changed,
+            project.source,
+            processor,
+            ignore=cfg.docs.ignore,
+            include_methodless=True,
+            existing=[r.path for r in actual],
+        )
+        actual = [r for r in actual if r.path in affected]
+        expected = [r for r in expected if r.path in affected]
+
+    return analyze_discrepancies(actual, expected, allow_additional=cfg.docs.allow_additional)
+
+
+def check_docs_structure(project: Project) -> tuple[str, bool]:
+    cfg = project.cfg
+    discrepancies = find_docs_discrepancies(project)
+    return (
+        make_discrepancy_report("DOCUMENTATION", discrepancies, cfg.docs.md_dir, cfg.root_dir),
+        discrepancies.found,
     )
 
+
+def find_tests_discrepancies(project: Project) -> Discrepancies:
+    cfg = project.cfg
+    processor = partial(map_to_test, cfg=cfg)
+    actual = sort_on_path(project.tests.records)
+    expected = sort_on_path(project.source.apply(processor, cfg.tests.ignore))
+    if project.changed is not None:
+        affected = find_affected_paths(
+            cfg,
+            project.changed,
+            project.source,
+            processor,
+            ignore=cfg.tests.ignore,
+            existing=[r.path for r in actual],
+        )
+        actual = [r for r in actual if r.path in affected]
+        expected = [r for r in expected if r.path in affected]
+
+    return analyze_discrepancies(actual, expected, allow_additional=cfg.tests.allow_additional)
+
+
+def check_tests_structure(project: Project) -> tuple[str, bool]:
+    cfg = project.cfg
+    discrepancies = find_tests_discrepancies(project)
     return (
-        make_discrepancy_report(
-            "DOCUMENTATION",
-            actual,
-            expected,
-            missing,
-            unexpected,
-            overlap,
-            cfg.docs.md_dir,
-            cfg.root_dir,
-        ),
-        any((missing, unexpected)),
+        make_discrepancy_report("TESTS", discrepancies, cfg.tests.unit_dir, cfg.root_dir),
+        discrepancies.found,
     )
 
 
-def check_tests_structure(
-    cfg: Configuration, source_objects: Objects, tests_objects: Objects
-) -> tuple[str, bool]:
-    actual: list[str] = sort_on_path(tests_objects.strings)
-    expected: list[str] = sort_on_path(
-        source_objects.apply(partial(map_to_test, cfg=cfg), cfg.tests.ignore)
-    )
-    missing, unexpected, overlap = analyze_discrepancies(
-        actual, expected, allow_additional=cfg.tests.allow_additional
+def find_import_problems(
+    project: Project, explain: bool = False
+) -> tuple[SetDict, SetDict, Chains | None]:
+    cfg = project.cfg
+    if project.import_graph is None:
+        project.import_graph = build_import_graph(cfg.imports, cfg.module_name)
+    graph = project.import_graph
+    internal, external = get_disallowed_imports(
+        cfg.imports, cfg.module_name, project.import_cache, graph
     )
+    project.import_cache.save()
+    chains = None
+    if explain:
+        modules = internal.keys() | external.keys()
+        violations = {m: internal.get(m, set()) | external.get(m, set()) for m in modules}
+        chains = find_import_chains(graph, violations, project.jobs)
+
+    return internal, external, chains
 
-    return (
-        make_discrepancy_report(
-            "TESTS",
-            actual,
-            expected,
-            missing,
-            unexpected,
-            overlap,
-            cfg.tests.unit_dir,
-            cfg.root_dir,
-        ),
-        any((missing, unexpected)),
-    )
 
+def has_import_problems(internal: SetDict, external: SetDict) -> bool:
+    # configured modules without violations are kept with an empty set
+    return any(internal.values()) or any(external.values())
 
-def check_imports(cfg: Configuration) -> tuple[str, bool]:
-    internal, external = get_disallowed_imports(cfg.imports, cfg.module_name)
 
+def check_imports(project: Project, explain: bool = False) -> tuple[str, bool]:
+    internal, external, chains = find_import_problems(project, explain)
     return (
-        make_imports_report(internal, external),
-        any((internal, external)),
+        make_imports_report(internal, external, chains),
+        has_import_problems(internal, external),
     )
+
+
+def iter_violations(
+    project: Project, check: str, explain: bool = False
+) -> Generator[Violation, None, bool]:
+    """
+    The violations found by `check` as structured records, for the machine-readable formats. The
+    check only runs once iteration reaches it, so output can start before later checks finish.
+    Returns whether the check failed, decided exactly as for its text report.
+    """
+    if check == "methods":
+        out_of_order = find_method_order_problems(project)
+        yield from iter_method_violations(out_of_order)
+        return bool(out_of_order)
+    if check in {"docs", "tests"}:
+        find = find_docs_discrepancies if check == "docs" else find_tests_discrepancies
+        discrepancies = find(project)
+        yield from iter_discrepancy_violations(check, discrepancies)
+        return discrepancies.found
+    if check == "imports":
+        internal, external, chains = find_import_problems(project, explain)
+        yield from iter_import_violations(internal, external, chains)
+        return has_import_problems(internal, external)
+    raise ValueError(f"Unknown check '{check}'.")
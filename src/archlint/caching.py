@@ -0,0 +1,249 @@
+import hashlib
+import hmac
+import json
+import os
+import pickle
+import secrets
+import time
+from collections.abc import Callable, Iterable, Sequence
+from contextlib import suppress
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+from typing import Any, TypeVar
+
+CACHE_FORMAT = 3
+RACY_WINDOW_NS = 2_000_000_000
+
+T = TypeVar("T")
+
+
+@dataclass
+class CacheEntry:
+    mtime_ns: int
+    size: int
+    digest: str
+    value: Any
+
+
+class ParseCache:
+    """
+    Per-file cache of collection results, persisted with pickle between runs.
+
+    Entries are keyed by absolute path. A matching size and modification time skips reading the
+    file altogether; otherwise the content hash decides whether the file must be parsed again.
+    The whole cache is discarded when its fingerprint (archlint version and configuration)
+    differs from the one it was written with.
+    """
+
+    def __init__(self, cache_file: Path | None = None, fingerprint: str = ""):
+        self.cache_file = cache_file
+        self.fingerprint = fingerprint
+        self.modified = False
+
+    @cached_property
+    def entries(self) -> dict[str, CacheEntry]:
+        return self.load_entries()
+
+    def get(self, path: Path, parser: Callable[[str], T]) -> T:
+        return self.get_many([path], [parser])[0]
+
+    def get_many(
+        self,
+        paths: Sequence[Path],
+        parsers: Sequence[Callable[[str], T]],
+        mapper: Callable[..., Iterable[CacheEntry]] = map,
+    ) -> list[T]:
+        keys = [str(p.absolute()) for p in paths]
+        stale = [i for i, (p, k) in enumerate(zip(paths, keys)) if not self.is_fresh(p, k)]
+        known_digests = [getattr(self.entries.get(keys[i]), "digest", "") for i in stale]
+        loaded = mapper(
+            load_entry, [paths[i] for i in stale], [parsers[i] for i in stale], known_digests
+        )
+
+        for i, new_entry in zip(stale, loaded):
+            old_entry = self.entries.get(keys[i])
+            if old_entry and old_entry.digest == new_entry.digest:
+                new_entry.value = old_entry.value
+            self.entries[keys[i]] = new_entry
+            self.modified = True
+
+        return [self.entries[k].value for k in keys]
+
+    def is_fresh(self, path: Path, key: str) -> bool:
+        stat = path.stat()
+        entry = self.entries.get(key)
+        return entry is not None and (entry.mtime_ns, entry.size) == (
+            stat.st_mtime_ns,
+            stat.st_size,
+        )
+
+    def load_entries(self) -> dict[str, CacheEntry]:
+        entries = load_pickle(self.cache_file, self.fingerprint)
+        return entries if isinstance(entries, dict) else {}
+
+    def save(self) -> None:
+        if not (self.cache_file and self.modified):
+            return
+        self.entries = {k: v for k, v in self.entries.items() if os.path.exists(k)}
+        save_pickle(self.cache_file, self.fingerprint, self.entries)
+        self.modified = False
+
+
+@dataclass
+class ImportEntries:
+    imports: dict[str, frozenset[str]] = field(default_factory=dict)
+    results: dict[tuple[str, str], tuple[frozenset[str], set[str]]] = field(default_factory=dict)
+
+
+class ImportCache:
+    """
+    Import-check results kept between runs: the direct imports of every module in the graph and,
+    per check pass and configured module, its upstream modules and violations.
+
+    A result stays valid as long as neither the configured module nor any module upstream of it
+    imports something else, since only then can its upstream closure change. The fingerprint
+    covers the import rules, so editing them discards everything.
+    """
+
+    def __init__(self, cache_file: Path | None = None, fingerprint: str = ""):
+        self.cache_file = cache_file
+        self.fingerprint = fingerprint
+        self.changed: set[str] | None = None
+        self.modified = False
+
+    @cached_property
+    def entries(self) -> ImportEntries:
+        return self.load_entries()
+
+    def get_result(self, key: str, module: str) -> set[str] | None:
+        if self.changed is None or (result := self.entries.results.get((key, module))) is None:
+            return None
+        upstream, violations = result
+        if module in self.changed or not self.changed.isdisjoint(upstream):
+            return None
+        return violations
+
+    def set_result(self, key: str, module: str, upstream: set[str], violations: set[str]) -> None:
+        self.entries.results[key, module] = (frozenset(upstream), violations)
+        self.modified = True
+
+    def update_imports(self, imports: dict[str, frozenset[str]]) -> None:
+        old = self.entries.imports
+        self.changed = {m for m in old.keys() | imports.keys() if old.get(m) != imports.get(m)}
+        if self.changed:
+            self.entries.imports = imports
+            self.modified = True
+
+    def load_entries(self) -> ImportEntries:
+        entries = load_pickle(self.cache_file, self.fingerprint)
+        return entries if isinstance(entries, ImportEntries) else ImportEntries()
+
+    def save(self) -> None:
+        if not (self.cache_file and self.modified):
+            return
+        save_pickle(self.cache_file, self.fingerprint, self.entries)
+        self.modified = False
+
+
+def load_entry(path: Path, parser: Callable[[str], Any], known_digest: str = "") -> CacheEntry:
+    stat = path.stat()
+    text = path.read_text()
+    digest = hash_text(text)
+    value = None if digest == known_digest else parser(text)
+    mtime_ns = stat.st_mtime_ns
+    if time.time_ns() - mtime_ns < RACY_WINDOW_NS:
+        # the file may still change within the timestamp resolution: force a hash check
+        mtime_ns = -1
+
+    return CacheEntry(mtime_ns, stat.st_size, digest, value)
+
+
+def load_pickle(cache_file: Path | None, fingerprint: str) -> Any:
+    """
+    The data saved with `save_pickle`, or None if there is none, it was saved with a different
+    fingerprint or its signature does not check out. Both are plain-text lines in front of the
+    pickle and are checked before anything is unpickled. The signature is made with the key of
+    `get_cache_key`, which lives outside of the project, so a cache file that this user's
+    archlint did not write, such as one committed to a cloned repository, is never unpickled.
+    """
+    if not (cache_file and cache_file.is_file()) or not (key := get_cache_key()):
+        return None
+    try:
+        header, signature, payload = cache_file.read_bytes().split(b"\n", 2)
+        if header != fingerprint.encode() or not hmac.compare_digest(
+            signature, sign_cache(key, header, payload)
+        ):
+            return None
+        return pickle.loads(payload)
+    except (OSError, EOFError, ValueError, TypeError, AttributeError, pickle.PickleError):
+        return None
+
+
+def save_pickle(cache_file: Path, fingerprint: str, data: Any) -> None:
+    """
+    Write `data` after a plain-text fingerprint line and its signature. Failing to write, for
+    example in a read-only checkout, only costs the next run its cache.
+    """
+    if not (key := get_cache_key()):
+        return
+    tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+    header, payload = fingerprint.encode(), pickle.dumps(data)
+    try:
+        make_cache_dir(cache_file.parent)
+        tmp_file.write_bytes(b"\n".join([header, sign_cache(key, header, payload), payload]))
+        tmp_file.replace(cache_file)
+    except OSError:
+        with suppress(OSError):
+            tmp_file.unlink(missing_ok=True)
+
+
+def sign_cache(key: bytes, header: bytes, payload: bytes) -> bytes:
+    return hmac.new(key, header + b"\n" + payload, hashlib.sha256).hexdigest().encode()
+
+
+def make_cache_dir(directory: Path) -> None:
+    """
+    Create `directory` with a `.gitignore` that ignores everything in it, so caches never show up
+    as untracked files.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    if not (gitignore := directory / ".gitignore").exists():
+        gitignore.write_text("# Created by archlint automatically.\n*\n")
+
+
+def get_cache_key() -> bytes | None:
+    """
+    The secret of the current user that cache files are signed with, kept in `archlint/cache.key`
+    under `$XDG_CACHE_HOME` (or `~/.cache`), outside of any project, and created on first use.
+    None when it can be neither read nor created, which turns the caches off.
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    key_file = Path(cache_home) / "archlint" / "cache.key"
+    try:
+        key_file.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        # exclusive creation, so concurrent first runs agree on one key
+        with suppress(FileExistsError):
+            fd = os.open(key_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(secrets.token_hex(32).encode())
+        return key_file.read_bytes() or None
+    except OSError:
+        return None
+
+
+def get_code_fingerprint() -> str:
+    """
+    Identifies the installed archlint code by the names, sizes and modification times of its
+    modules, which is cheaper than `importlib.metadata` and also catches editable installs.
+    """
+    modules = sorted(Path(__file__).parent.glob("*.py"))
+    return make_fingerprint([(p.name, p.stat().st_mtime_ns, p.stat().st_size) for p in modules])
+
+
+def hash_text(text: str) -> str:
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def make_fingerprint(*parts: Any) -> str:
+    return hash_text(json.dumps(parts, sort_keys=True, default=str))
@@ -0,0 +1,51 @@
+import subprocess
+from pathlib import Path
+
+
+def run_git(root_dir: Path, *args: str) -> list[str]:
+    try:
+        result = subprocess.run(
+            ["git", *args],
+            cwd=root_dir,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        details = getattr(e, "stderr", "") or str(e)
+        raise ValueError(f"'git {' '.join(args)}' failed: {details.strip()}") from e
+    return [line for line in result.stdout.splitlines() if line]
+
+
+def get_changed_files(root_dir: Path, since: str | None = None, staged: bool = False) -> set[Path]:
+    """
+    Files, relative to `root_dir`, that differ from the merge base of `since` and HEAD (including
+    uncommitted and untracked files), or that are staged. Deleted files are included, and
+    renamed files under both their old and their new name.
+    """
+    changed: set[str] = set()
+    if staged:
+        changed.update(
+            run_git(root_dir, "diff", "--name-only", "--no-renames", "--relative", "--cached")
+        )
+    if since:
+        changed.update(
+            run_git(
+                root_dir, "diff", "--name-only", "--no-renames", "--relative", "--merge-base", since
+            )
+        )
+        changed.update(run_git(root_dir, "ls-files", "--others", "--exclude-standard"))
+    return set(map(Path, changed))
+
+
+def get_changed_scope(
+    root_dir: Path, since: str | None = None, staged: bool = False
+) -> set[Path] | None:
+    """
+    The changed files to restrict checks to, or None when everything must be checked: neither
+    `since` nor `staged` is given, or the configuration itself changed.
+    """
+    if not (since or staged):
+        return None
+    changed = get_changed_files(root_dir, since, staged)
+    return None if Path("pyproject.toml") in changed else changed
@@ -1,4 +1,11 @@
+import io
+import os
 import sys
+import traceback
+from collections.abc import Iterator
+from contextlib import redirect_stderr, redirect_stdout
+from functools import partial
+from typing import TYPE_CHECKING
 
 import click
 
@@ -7,23 +14,167 @@ from . import (
     check_imports,
     check_method_order,
     check_tests_structure,
+    iter_violations,
 )
-from .collection import (
-    collect_docs_objects,
-    collect_source_objects,
-)
-from .configuration import Configuration, get_config
+from .caching import CACHE_FORMAT, ParseCache, get_code_fingerprint, make_fingerprint
+from .changes import get_changed_scope
+from .collection import Project
+from .configuration import load_config
+from .reporting import Violation, write_jsonl, write_sarif
+from .utils import get_project_root
+
+if TYPE_CHECKING:
+    from .daemon import DaemonState
+    from .watching import Check
+
+TEXT_CHECKS: dict[str, "Check"] = {
+    "methods": check_method_order,
+    "docs": check_docs_structure,
+    "tests": check_tests_structure,
+    "imports": check_imports,
+}
+WRITERS = {"jsonl": write_jsonl, "sarif": write_sarif}
+# The daemon and watch machinery is imported by the commands that use it, to keep startup fast.
 
 
 def main():
+    args = sys.argv[1:]
+    if "--use-daemon" in args:
+        # handled before click parses anything, so the client never collects the project itself
+        sys.exit(run_with_daemon([arg for arg in args if arg != "--use-daemon"]))
+
     problems = archlint_cli(standalone_mode=False)
     sys.exit(int(problems))
 
 
+def make_project(jobs: int = 1, changed_since: str | None = None, staged: bool = False) -> Project:
+    cfg = load_config()
+    cache = ParseCache(
+        cfg.cache_dir / "parse.pickle",
+        make_fingerprint(get_code_fingerprint(), CACHE_FORMAT, cfg.root_dir, cfg.fingerprint),
+    )
+    return Project(cfg, cache, jobs, get_changed_scope(cfg.root_dir, changed_since, staged))
+
+
+def run_checks(ctx: click.Context, checks: list[str], explain: bool = False) -> bool:
+    """
+    Run `checks` in order and write each one's output as soon as it is done, as colored reports
+    or, with `--format jsonl|sarif`, as a stream of structured violations. Every format fails the
+    run on the same findings.
+    """
+    project: Project = ctx.obj["PROJECT"]
+    problems = False
+    if (output_format := ctx.obj.get("FORMAT", "text")) != "text":
+
+        def stream() -> Iterator[Violation]:
+            nonlocal problems
+            for check in checks:
+                problems |= yield from iter_violations(project, check, explain)
+
+        WRITERS[output_format](stream(), partial(click.echo, nl=False))
+        return problems
+
+    for check in checks:
+        report, found = (
+            check_imports(project, explain) if check == "imports" else TEXT_CHECKS[check](project)
+        )
+        click.echo(report)
+        problems |= found
+    click.echo()
+
+    return problems
+
+
+def run_with_daemon(args: list[str]) -> int:
+    from .daemon import get_socket_path, request_daemon  # noqa: PLC0415
+
+    try:
+        response = request_daemon(
+            get_socket_path(get_project_root()), {"command": "run", "argv": args}
+        )
+    except OSError:
+        click.echo("No archlint daemon is running, checking in-process.", err=True)
+        return int(archlint_cli.main(args, prog_name="archlint", standalone_mode=False))
+
+    if "error" in response:
+        click.echo(f"Error: {response['error']}", err=True)
+        return 2
+    click.echo(response["stdout"], nl=False)
+    click.echo(response["stderr"], nl=False, err=True)
+    return response["exit_code"]
+
+
+def run_in_daemon(state: "DaemonState", args: list[str]) -> tuple[str, str, int]:
+    """
+    Run the CLI on `args` inside the daemon, capturing stdout and stderr separately so the client
+    can write each to its own stream, as an in-process run would.
+    """
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+        try:
+            result = archlint_cli.main(
+                args,
+                prog_name="archlint",
+                standalone_mode=False,
+                obj={"MAKE_PROJECT": state.get_project},
+            )
+            exit_code = int(result or 0)
+        except click.ClickException as e:
+            e.show()
+            exit_code = e.exit_code
+        except Exception:
+            # a failing request must not take the daemon down
+            traceback.print_exc()
+            exit_code = 1
+
+    return stdout.getvalue(), stderr.getvalue(), exit_code
+
+
 @click.group(invoke_without_command=True)
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    default=os.cpu_count() or 1,
+    show_default=True,
+    help="Number of processes used to parse files.",
+)
+@click.option(
+    "--changed-since",
+    metavar="REF",
+    help="Only check what files changed since the merge base with REF can affect.",
+)
+@click.option("--staged", is_flag=True, help="Only check what staged files can affect.")
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["text", "jsonl", "sarif"]),
+    default="text",
+    show_default=True,
+    help="Colored reports, or violations streamed as JSON Lines or a SARIF log.",
+)
+@click.option(
+    "--use-daemon",
+    is_flag=True,
+    expose_value=False,
+    help="Send the request to a running 'archlint daemon' instead of checking in-process.",
+)
 @click.pass_context
-def archlint_cli(ctx: click.Context):
-    ctx.ensure_object(dict)["CFG"] = get_config()
+def archlint_cli(
+    ctx: click.Context, jobs: int, changed_since: str | None, staged: bool, output_format: str
+):
+    ctx.ensure_object(dict)
+    if "MAKE_PROJECT" in ctx.obj and ctx.invoked_subcommand in {"daemon", "watch"}:
+        raise click.UsageError(f"'{ctx.invoked_subcommand}' cannot be run through the daemon.")
+
+    project = ctx.obj.get("MAKE_PROJECT", make_project)(jobs, changed_since, staged)
+    ctx.obj["PROJECT"] = project
+    ctx.obj["JOBS"] = jobs
+    ctx.obj["CHANGED_SINCE"] = changed_since
+    ctx.obj["STAGED"] = staged
+    ctx.obj["FORMAT"] = output_format
+    if project.cache:
+        ctx.call_on_close(project.cache.save)
 
     if ctx.invoked_subcommand is None:
         return ctx.invoke(run_all)
@@ -32,71 +183,117 @@ def archlint_cli(ctx: click.Context):
 @archlint_cli.command(name="all", help="Run all checks: methods, docs, tests, imports.")
 @click.pass_context
 def run_all(ctx: click.Context) -> bool:
-    cfg: Configuration = ctx.obj["CFG"]
+    return run_checks(ctx, ["methods", "docs", "tests", "imports"])
 
-    source_objects = collect_source_objects(cfg.module_root_dir, cfg.root_dir)
-    tests_objects = collect_source_objects(cfg.tests.unit_dir, cfg.root_dir)
-    docs_objects = collect_docs_objects(cfg.docs.md_dir, cfg.root_dir)
 
-    mo_report, mo_problems = check_method_order(cfg, source_objects)
-    docs_report, docs_problems = check_docs_structure(cfg, source_objects, docs_objects)
-    tests_report, tests_problems = check_tests_structure(cfg, source_objects, tests_objects)
-    imports_report, imports_problems = check_imports(cfg)
+@archlint_cli.command(help="Verify documentation presence and formatting.")
+@click.pass_context
+def docs(ctx: click.Context) -> bool:
+    return run_checks(ctx, ["docs"])
 
-    click.echo(mo_report)
-    click.echo(docs_report)
-    click.echo(tests_report)
-    click.echo(imports_report)
-    click.echo()
 
-    return any((mo_problems, docs_problems, tests_problems, imports_problems))
+@archlint_cli.command(help="Inspect import structures and dependencies.")
+@click.option("--explain", is_flag=True, help="Show the import chain behind each violation.")
+@click.pass_context
+def imports(ctx: click.Context, explain: bool) -> bool:
+    return run_checks(ctx, ["imports"], explain)
 
 
-@archlint_cli.command(help="Verify documentation presence and formatting.")
+@archlint_cli.command(help="Check method structure and naming conventions.")
 @click.pass_context
-def docs(ctx: click.Context) -> bool:
-    cfg: Configuration = ctx.obj["CFG"]
-    source_objects = collect_source_objects(cfg.module_root_dir, cfg.root_dir)
-    docs_objects = collect_docs_objects(cfg.docs.md_dir, cfg.root_dir)
+def methods(ctx: click.Context) -> bool:
+    return run_checks(ctx, ["methods"])
 
-    report, problems = check_docs_structure(cfg, source_objects, docs_objects)
-    click.echo(report)
-    click.echo()
 
-    return problems
+@archlint_cli.command(help="Check test organization and conventions.")
+@click.pass_context
+def tests(ctx: click.Context) -> bool:
+    return run_checks(ctx, ["tests"])
 
 
-@archlint_cli.command(help="Inspect import structures and dependencies.")
+@archlint_cli.command(help="Re-run the affected checks whenever source, tests or docs change.")
+@click.option(
+    "--interval",
+    type=click.FloatRange(min=0.01),
+    default=0.25,
+    show_default=True,
+    help="Seconds between polls of the file tree.",
+)
 @click.pass_context
-def imports(ctx: click.Context) -> bool:
-    report, problems = check_imports(ctx.obj["CFG"])
-    click.echo(report)
-    click.echo()
+def watch(ctx: click.Context, interval: float) -> bool:
+    from .watching import watch_project  # noqa: PLC0415
 
-    return problems
+    if ctx.obj["FORMAT"] != "text":
+        raise click.UsageError("'watch' only writes text reports.")
+    reload = partial(make_project, ctx.obj["JOBS"], ctx.obj["CHANGED_SINCE"], ctx.obj["STAGED"])
+    try:
+        watch_project(ctx.obj["PROJECT"], reload, TEXT_CHECKS, interval=interval, echo=click.echo)
+    except KeyboardInterrupt:
+        pass
 
+    return False
 
-@archlint_cli.command(help="Check method structure and naming conventions.")
+
+@archlint_cli.group(help="Manage a resident server that keeps the parsed project in memory.")
+def daemon():
+    pass
+
+
+@daemon.command(name="start", help="Start the daemon in the background.")
 @click.pass_context
-def methods(ctx: click.Context) -> bool:
-    cfg: Configuration = ctx.obj["CFG"]
-    source_objects = collect_source_objects(cfg.module_root_dir, cfg.root_dir)
-    report, problems = check_method_order(cfg, source_objects)
-    click.echo(report)
-    click.echo()
+def start_daemon_command(ctx: click.Context) -> bool:
+    from .daemon import get_daemon_status, get_socket_path, start_daemon  # noqa: PLC0415
 
-    return problems
+    cfg = ctx.obj["PROJECT"].cfg
+    socket_path = get_socket_path(cfg.root_dir)
+    if not (status := get_daemon_status(socket_path)):
+        status = start_daemon(cfg.root_dir, socket_path, cfg.cache_dir / "daemon.log")
+    click.echo(f"archlint daemon running (pid {status['pid']}).")
 
+    return False
 
-@archlint_cli.command(help="Check test organization and conventions.")
+
+@daemon.command(name="stop", help="Stop the daemon.")
 @click.pass_context
-def tests(ctx: click.Context) -> bool:
-    cfg: Configuration = ctx.obj["CFG"]
-    source_objects = collect_source_objects(cfg.module_root_dir, cfg.root_dir)
-    tests_objects = collect_source_objects(cfg.tests.unit_dir, cfg.root_dir)
+def stop_daemon_command(ctx: click.Context) -> bool:
+    from .daemon import get_socket_path, request_daemon  # noqa: PLC0415
 
-    report, problems = check_tests_structure(cfg, source_objects, tests_objects)
-    click.echo(report)
-    click.echo()
+    socket_path = get_socket_path(ctx.obj["PROJECT"].cfg.root_dir)
+    try:
+        request_daemon(socket_path, {"command": "stop"}, timeout=5)
+    except OSError:
+        click.echo("No archlint daemon is running.")
+    else:
+        click.echo("archlint daemon stopped.")
 
-    return problems
+    return False
+
+
+@daemon.command(name="status", help="Show whether the daemon is running; exit 1 if it is not.")
+@click.pass_context
+def daemon_status_command(ctx: click.Context) -> bool:
+    from .daemon import get_daemon_status, get_socket_path  # noqa: PLC0415
+
+    if not (status := get_daemon_status(get_socket_path(ctx.obj["PROJECT"].cfg.root_dir))):
+        click.echo("No archlint daemon is running.")
+        return True
+
+    click.echo(
+        f"archlint daemon running (pid {status['pid']}) for {status['root_dir']}, "
+        f"up {status['uptime']:.0f} s, {status['requests']} requests served."
+    )
+    return False
+
+
+@daemon.command(name="run", help="Run the daemon in the foreground.")
+@click.pass_context
+def run_daemon_command(ctx: click.Context) -> bool:
+    from .daemon import DaemonState, get_socket_path, serve_daemon  # noqa: PLC0415
+
+    project: Project = ctx.obj["PROJECT"]
+    state = DaemonState(project, partial(make_project, ctx.obj["JOBS"]))
+    socket_path = get_socket_path(project.cfg.root_dir)
+    click.echo(f"archlint daemon (pid {os.getpid()}) listening on {socket_path}")
+    serve_daemon(socket_path, state, partial(run_in_daemon, state))
+
+    return False
@@ -1,61 +1,192 @@
+import ast
 import re
-from collections.abc import Callable
-from functools import partial
+from collections.abc import Callable, Collection, Iterable
+from dataclasses import dataclass, field, replace
+from functools import cached_property, partial
 from itertools import chain
 from pathlib import Path
-from typing import cast
+from re import Pattern
+from typing import TYPE_CHECKING
 
+from .caching import ImportCache, ParseCache, make_fingerprint
+from .configuration import Configuration, IgnoreRules
 from .regexes import Regex
+from .traversal import walk_files
 from .utils import (
     always_true,
     deduplicate_ordered,
     get_method_name,
-    path_matches_not,
+    parse_base_classes,
     project,
     remove_body,
     safe_search,
 )
 
-ClassInfo = tuple[Path, int, str, list[str], dict[str, str], list[str]]
+if TYPE_CHECKING:
+    import grimp
+
+MIN_FILES_PER_JOB = 16
+FUNCTION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef)
+
 ClassInfoBase = tuple[str, list[str], dict[str, str], list[str]]
 
 
+@dataclass(frozen=True, slots=True)
+class FunctionInfo:
+    path: Path
+    index: int
+    name: str
+
+
+@dataclass(frozen=True, slots=True)
+class ClassInfo:
+    path: Path
+    index: int
+    name: str
+    methods: list[str]
+    method_dict: dict[str, str]
+    super_classes: list[str]
+
+
+@dataclass(frozen=True, slots=True)
+class ObjectRecord:
+    """
+    A function, class or method of a file, as it flows through mapping, analysis and reporting.
+    Records compare on path, owner and name only, so the same object found at another position is
+    still the same object. Methods carry the name of their class in `owner`.
+    """
+
+    path: Path
+    index: int = field(compare=False)
+    name: str
+    owner: str = ""
+
+    @property
+    def qualname(self) -> str:
+        return f"{self.owner}.{self.name}" if self.owner else self.name
+
+    def __str__(self) -> str:
+        return f"{self.path}:{self.qualname}"
+
+
 class Objects:
-    def __init__(self, functions: list[tuple[Path, int, str]], classes: list[ClassInfo]):
+    """
+    Functions and classes collected from a tree. The records derived from them are built on first
+    access and kept, so repeated use by several checks costs nothing.
+    """
+
+    def __init__(self, functions: list[FunctionInfo], classes: list[ClassInfo]):
         self.functions = functions
         self.classes = add_inherited_methods(classes)
 
-    @property
-    def function_strings(self) -> list[str]:
-        return [f"{p}:{i:0>3}:{func}" for p, i, func in self.functions]
+    @cached_property
+    def function_records(self) -> list[ObjectRecord]:
+        return [ObjectRecord(f.path, f.index, f.name) for f in self.functions]
 
-    @property
-    def method_strings(self) -> list[str]:
-        def _chain(_l: list[list]) -> list:
-            return list(chain.from_iterable(_l))
-
-        _classes = sorted(self.classes, key=lambda tup: tup[0])
-        quads = _chain([[(p, i, c, m) for m in methods] for p, i, c, methods, _, __ in _classes])
-        return [f"{p}:{i:0>3}:{c}.{m}" for p, i, c, m in quads]
+    @cached_property
+    def method_records(self) -> list[ObjectRecord]:
+        _classes = sorted(self.classes, key=lambda c: c.path)
+        return [ObjectRecord(c.path, c.index, m, c.name) for c in _classes for m in c.methods]
 
-    @property
-    def strings(self) -> list[str]:
-        return self.method_strings + self.function_strings
+    @cached_property
+    def records(self) -> list[ObjectRecord]:
+        return self.method_records + self.function_records
 
-    @property
-    def methodless(self) -> list[str]:
-        return [f"{p}:{i:0>3}:{cl}" for p, i, cl, methods, _, __ in self.classes if not methods]
+    @cached_property
+    def methodless(self) -> list[ObjectRecord]:
+        return [ObjectRecord(c.path, c.index, c.name) for c in self.classes if not c.methods]
 
     def apply(
         self,
-        processor: Callable[[str], str],
-        ignore: re.Pattern | None = None,
+        processor: Callable[[ObjectRecord], ObjectRecord | None],
+        ignore: IgnoreRules | None = None,
         include_methodless: bool = False,
-    ) -> list[str]:
-        _strings: list[str] = self.strings + (self.methodless if include_methodless else [])
+        paths: Collection[Path] | None = None,
+    ) -> list[ObjectRecord]:
+        """
+        Map the records through `processor`, dropping those it returns None for. Files matched by
+        the path rules of `ignore` are dropped as a whole, before any of their records is looked
+        at; the records of the other files are matched against all rules.
+        """
+        _records = self.records + (self.methodless if include_methodless else [])
+        if paths is not None:
+            _records = [r for r in _records if r.path in paths]
         if ignore:
-            _strings = list(filter(partial(path_matches_not, path_pattern=ignore), _strings))
-        return list(filter(bool, map(processor, _strings)))
+            files = dict.fromkeys(r.path for r in _records)
+            ignored = {p for p in files if ignore.paths.search(str(p))}
+            _records = [r for r in _records if r.path not in ignored]
+            if ignore.objects is not Regex.MATCH_NOTHING:
+                _records = [r for r in _records if not ignore.objects.search(str(r))]
+        return [mapped for r in _records if (mapped := processor(r))]
+
+
+class Project:
+    """
+    Source, tests and docs objects of a project, each collected lazily at most once per run and
+    shared by all checks. The import graph is kept as well once the imports check has built it,
+    until the source objects are invalidated.
+    """
+
+    def __init__(
+        self,
+        cfg: Configuration,
+        cache: ParseCache | None = None,
+        jobs: int = 1,
+        changed: set[Path] | None = None,
+    ):
+        self.cfg = cfg
+        self.cache = cache
+        self.jobs = jobs
+        self.changed = changed
+        self.import_graph: grimp.ImportGraph | None = None
+
+    @cached_property
+    def source(self) -> Objects:
+        cfg = self.cfg
+        return collect_source_objects(
+            cfg.module_root_dir,
+            cfg.root_dir,
+            self.cache,
+            self.jobs,
+            cfg.collector,
+            exclude=cfg.exclude,
+        )
+
+    @cached_property
+    def tests(self) -> Objects:
+        cfg = self.cfg
+        return collect_source_objects(
+            cfg.tests.unit_dir,
+            cfg.root_dir,
+            self.cache,
+            self.jobs,
+            cfg.collector,
+            exclude=cfg.exclude,
+        )
+
+    @cached_property
+    def docs(self) -> Objects:
+        cfg = self.cfg
+        return collect_docs_objects(
+            cfg.docs.md_dir, cfg.root_dir, self.cache, self.jobs, exclude=cfg.exclude
+        )
+
+    @cached_property
+    def import_cache(self) -> ImportCache:
+        # persisted next to the parse cache, so only runs that keep one keep import results
+        if not (self.cache and self.cache.cache_file):
+            return ImportCache()
+        return ImportCache(
+            self.cache.cache_file.with_name("imports.pickle"),
+            make_fingerprint(self.cache.fingerprint, self.cfg.imports.fingerprint),
+        )
+
+    def invalidate(self, *names: str) -> None:
+        names = names or ("source", "tests", "docs")
+        for name in names:
+            self.__dict__.pop(name, None)
+        if "source" in names:
+            self.import_graph = None
 
 
 def collect_method_info(class_text: str) -> ClassInfoBase:
@@ -71,7 +202,7 @@ def collect_method_info(class_text: str) -> ClassInfoBase:
     method_strings = list(filter(is_method, map(remove_body, class_text.split("\n\n    ")[1:])))
     method_names = deduplicate_ordered(map(get_method_name, method_strings))
     method_dict = {k: v for k, v in zip(method_names, method_strings) if k}
-    super_classes = re.findall(Regex.SUPER_CLASS, class_text)
+    super_classes = parse_base_classes(class_text)
     method_names = list(filter(bool, method_names))
 
     return class_name, method_names, method_dict, super_classes
@@ -84,17 +215,42 @@ def parse_function(src_text: str, condition: Callable[[str], bool] = always_true
 def collect_objects_in_md(
     src_text: str, condition: Callable[[str], bool] = always_true
 ) -> list[tuple[int, str]]:
-    return list(enumerate(filter(condition, re.findall(Regex.OBJECT_IN_MD, src_text))))
-
-
-def collect_docs_objects(md_dir: Path, project_root: Path) -> Objects:
-    functions: list[tuple[Path, int, str]] = []
-
-    for _p in sorted(md_dir.rglob("*.md")):
-        source = _p.read_text()
+    """
+    The objects named by mkdocstrings headings (`## ::: pkg.mod.Name`), numbered in order. Only
+    lines containing `:::` can hold one, so the text is skipped from one `:::` to the next with
+    `str.find` and the heading pattern is matched on those lines alone, instead of being tried at
+    every position of long prose pages.
+    """
+    names: list[str] = []
+    start = 0
+    while (marker := src_text.find(":::", start)) != -1:
+        # the heading pattern ends in a newline, so an unterminated last line never matches
+        if (line_end := src_text.find("\n", marker)) == -1:
+            break
+        line_start = src_text.rfind("\n", 0, marker) + 1
+        if match := Regex.OBJECT_IN_MD.search(src_text, line_start, line_end + 1):
+            names.append(match.group(1))
+        start = line_end + 1
+
+    return list(enumerate(filter(condition, names)))
+
+
+def collect_docs_objects(
+    md_dir: Path,
+    project_root: Path,
+    cache: ParseCache | None = None,
+    jobs: int = 1,
+    *,
+    exclude: Pattern = Regex.MATCH_NOTHING,
+) -> Objects:
+    functions: list[FunctionInfo] = []
+
+    paths = list(walk_files(md_dir, ".md", project_root, exclude))
+    parsers = [collect_objects_in_md] * len(paths)
+    mapper = partial(map_parallel, jobs=jobs)
+    for _p, objects_in_md in zip(paths, (cache or ParseCache()).get_many(paths, parsers, mapper)):
         p = _p.relative_to(project_root)
-        new_functions = cast(list[tuple[Path, int, str]], project(p, collect_objects_in_md(source)))
-        functions.extend(new_functions)
+        functions.extend(FunctionInfo(*t) for t in project(p, objects_in_md))
 
     return Objects(functions=functions, classes=[])
 
@@ -103,30 +259,154 @@ def collect_object_texts(source: str) -> list[str]:
     return re.findall(Regex.OBJECT_TEXT, source)
 
 
-def collect_source_objects(src_dir: Path, root_dir: Path) -> Objects:
-    functions: list[tuple[Path, int, str]] = []
+def collect_file_objects(source: str, p: Path) -> tuple[list[FunctionInfo], list[ClassInfo]]:
+    functions: list[FunctionInfo] = []
     classes: list[ClassInfo] = []
 
-    for _p in sorted(src_dir.rglob("*.py")):
-        p = _p.relative_to(root_dir)
-        for i, text in enumerate(collect_object_texts(_p.read_text())):
-            if text.startswith(("@dataclass", "class ")):
-                if class_tuple := collect_method_info(text):
-                    classes.append((p, i, *class_tuple))
-            elif text.startswith(("@", "def ")):
-                if func_name := parse_function(text):
-                    functions.append((p, i, func_name))
+    for i, text in enumerate(collect_object_texts(source)):
+        if text.startswith(("@dataclass", "class ")):
+            if class_tuple := collect_method_info(text):
+                classes.append(ClassInfo(p, i, *class_tuple))
+        elif text.startswith(("@", "def ")):
+            if func_name := parse_function(text):
+                functions.append(FunctionInfo(p, i, func_name))
+
+    return functions, classes
+
+
+def collect_class_info_ast(node: ast.ClassDef, lines: list[str]) -> ClassInfoBase:
+    def get_name(base: ast.expr) -> str:
+        if isinstance(base, ast.Subscript):
+            return get_name(base.value)
+        if isinstance(base, ast.Attribute):
+            return base.attr
+        return base.id if isinstance(base, ast.Name) else ""
+
+    def get_header(func: ast.FunctionDef | ast.AsyncFunctionDef) -> str:
+        start = func.decorator_list[0].lineno if func.decorator_list else func.lineno
+        end = max(func.body[0].lineno - 1, func.lineno)
+        return remove_body("\n".join(lines[start - 1 : end]).lstrip() + "\n")
+
+    method_dict: dict[str, str] = {}
+    for func in node.body:
+        if isinstance(func, FUNCTION_NODES):
+            method_dict.setdefault(func.name, get_header(func))
+    super_classes = list(filter(bool, map(get_name, node.bases)))
+
+    return node.name, list(method_dict), method_dict, super_classes
+
+
+def collect_file_objects_ast(source: str, p: Path) -> tuple[list[FunctionInfo], list[ClassInfo]]:
+    """
+    Single-pass alternative to `collect_file_objects` built on `ast`, which also picks up async
+    definitions and methods not separated by blank lines. Files that do not parse fall back to
+    the regex collector.
+    """
+    try:
+        module = ast.parse(source)
+    except SyntaxError:
+        return collect_file_objects(source, p)
+
+    functions: list[FunctionInfo] = []
+    classes: list[ClassInfo] = []
+    lines = source.splitlines()
+
+    nodes = (n for n in module.body if isinstance(n, (ast.ClassDef, *FUNCTION_NODES)))
+    for i, node in enumerate(nodes):
+        if isinstance(node, ast.ClassDef):
+            classes.append(ClassInfo(p, i, *collect_class_info_ast(node, lines)))
+        else:
+            functions.append(FunctionInfo(p, i, node.name))
+
+    return functions, classes
+
+
+def collect_source_objects(
+    src_dir: Path,
+    root_dir: Path,
+    cache: ParseCache | None = None,
+    jobs: int = 1,
+    collector: str = "regex",
+    *,
+    exclude: Pattern = Regex.MATCH_NOTHING,
+) -> Objects:
+    functions: list[FunctionInfo] = []
+    classes: list[ClassInfo] = []
+
+    paths = list(walk_files(src_dir, ".py", root_dir, exclude))
+    collect = collect_file_objects_ast if collector == "ast" else collect_file_objects
+    parsers = [partial(collect, p=_p.relative_to(root_dir)) for _p in paths]
+    mapper = partial(map_parallel, jobs=jobs)
+    for new_functions, new_classes in (cache or ParseCache()).get_many(paths, parsers, mapper):
+        functions.extend(new_functions)
+        classes.extend(new_classes)
 
     return Objects(functions=functions, classes=classes)
 
 
-def add_inherited_methods(class_tuples: list[ClassInfo]) -> list[ClassInfo]:
-    methods = {d[2]: d[3] for d in class_tuples}
-    superclasses = {d[2]: d[5] for d in class_tuples}
+def map_parallel(func: Callable, *iterables: Iterable, jobs: int = 1) -> list:
+    """
+    Order-preserving `map` over a process pool, falling back to a plain `map` when there is too
+    little work to amortize starting the workers.
+    """
+    args = list(zip(*iterables))
+    workers = min(jobs, len(args) // MIN_FILES_PER_JOB)
+    if workers <= 1:
+        return [func(*a) for a in args]
+
+    from concurrent.futures import ProcessPoolExecutor  # noqa: PLC0415 - costly, rarely needed
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunksize = max(1, len(args) // (workers * 4))
+        return list(executor.map(func, *zip(*args), chunksize=chunksize))
+
 
-    for _ in range(2):
-        for classname, superclass_names in superclasses.items():
-            inherited = list(chain.from_iterable([methods.get(sc, []) for sc in superclass_names]))
-            methods[classname] = deduplicate_ordered(methods[classname] + inherited)
+def resolve_base_classes(classes: list[ClassInfo]) -> list[list[int]]:
+    """
+    For each class, the positions of its known base classes in `classes`. A base name refers to
+    the class of that name in the same module if there is one, else to the first class of that
+    name in path order; unknown bases are dropped.
+    """
+    in_module: dict[tuple[Path, str], int] = {}
+    anywhere: dict[str, int] = {}
+    for idx, c in enumerate(classes):
+        in_module.setdefault((c.path, c.name), idx)
+        anywhere.setdefault(c.name, idx)
 
-    return [(p, i, n, methods[n], md, s) for p, i, n, _, md, s in class_tuples]
+    def resolve(c: ClassInfo, base: str) -> int | None:
+        return in_module.get((c.path, base), anywhere.get(base))
+
+    return [
+        [j for base in c.super_classes if (j := resolve(c, base)) is not None and j != idx]
+        for idx, c in enumerate(classes)
+    ]
+
+
+def add_inherited_methods(class_tuples: list[ClassInfo]) -> list[ClassInfo]:
+    """
+    Extend the methods of each class by those of all its ancestors, own methods first, then each
+    base's resolved methods in declaration order. Classes are visited in a depth-first post-order
+    of the inheritance graph, so every class is resolved exactly once; a base that is still being
+    resolved (a cycle) contributes nothing.
+    """
+    bases = resolve_base_classes(class_tuples)
+    resolved: list[list[str] | None] = [None] * len(class_tuples)
+    visited = [False] * len(class_tuples)
+
+    for root in range(len(class_tuples)):
+        if visited[root]:
+            continue
+        visited[root] = True
+        stack = [(root, iter(bases[root]))]
+        while stack:
+            idx, pending = stack[-1]
+            if (base := next(pending, None)) is not None:
+                if not visited[base]:
+                    visited[base] = True
+                    stack.append((base, iter(bases[base])))
+                continue
+            stack.pop()
+            inherited = (resolved[b] or [] for b in bases[idx])
+            resolved[idx] = deduplicate_ordered(chain(class_tuples[idx].methods, *inherited))
+
+    return [replace(c, methods=m or []) for c, m in zip(class_tuples, resolved)]
@@ -6,15 +6,26 @@ from pathlib import Path
 from re import Pattern
 from typing import cast
 
+from .caching import (
+    CACHE_FORMAT,
+    get_code_fingerprint,
+    hash_text,
+    load_pickle,
+    make_fingerprint,
+    save_pickle,
+)
 from .regexes import Regex
 from .utils import (
     assert_bool,
     compile_for_path_segment,
     get_project_root,
+    make_first_match_pattern,
     make_regex,
     prepend_module_name,
 )
 
+DEFAULT_CACHE_DIR = ".archlint_cache"
+
 
 @dataclass
 class ImportInfo:
@@ -22,13 +33,38 @@ class ImportInfo:
     external: dict[str, set[str]]
 
 
+@dataclass
+class LayersConfig:
+    """
+    Layers from highest to lowest, each a set of sibling modules relative to every container.
+    """
+
+    layers: list[set[str]]
+    containers: set[str]
+    independent: bool
+
+
 @dataclass
 class ImportConfig:
     internal_allowed_everywhere: set[str]
     external_allowed_everywhere: set[str]
     allowed: ImportInfo
     disallowed: ImportInfo
+    layers: LayersConfig | None
     grimp_cache: str
+    fingerprint: str
+
+
+def get_layers_config(raw_import_config: dict, module_name: str) -> LayersConfig | None:
+    if not (raw_layers_config := raw_import_config.get("layers")):
+        return None
+    containers = raw_layers_config.get("containers", [])
+    return LayersConfig(
+        # siblings within a layer are written "a | b"
+        layers=[set(map(str.strip, layer.split("|"))) for layer in raw_layers_config["order"]],
+        containers={prepend_module_name(c, module_name) for c in containers} or {module_name},
+        independent=assert_bool(raw_layers_config.get("independent", True)),
+    )
 
 
 def get_import_config(raw_config: dict, module_name: str) -> ImportConfig:
@@ -67,7 +103,9 @@ def get_import_config(raw_config: dict, module_name: str) -> ImportConfig:
                 raw_import_config["disallowed"].get("external", {}), mod_name=module_name
             ),
         ),
+        layers=get_layers_config(raw_import_config, module_name),
         grimp_cache=raw_import_config.get("grimp_cache", ".grimp_cache"),
+        fingerprint=make_fingerprint(module_name, raw_import_config),
     )
 
 
@@ -78,6 +116,7 @@ def get_import_config(raw_config: dict, module_name: str) -> ImportConfig:
 class MethodOrderConfig:
     normal: float
     ordering: tuple[tuple[re.Pattern, float], ...]
+    classifier: re.Pattern | None = None
 
 
 def get_method_order_config(raw_config: dict) -> MethodOrderConfig:
@@ -107,33 +146,57 @@ def get_method_order_config(raw_config: dict) -> MethodOrderConfig:
         )
     ]
 
+    ordering = tuple(custom + predefined)
     return MethodOrderConfig(
         normal=float(raw_mo_config["normal"]),
-        ordering=tuple(custom + predefined),
+        ordering=ordering,
+        classifier=make_first_match_pattern(regexpr for regexpr, _ in ordering),
     )
 
 
 # STRUCTURE
 
 
-@dataclass
+@dataclass(frozen=True)
+class IgnoreRules:
+    paths: Pattern
+    objects: Pattern
+
+
+def get_ignore_rules(s: str) -> IgnoreRules:
+    """
+    Compile an `ignore` setting for matching against the `path:Class.method` form of objects,
+    plus a pattern of the segments that can also be decided from the file path alone: those that
+    neither contain `:` nor end in `$`. A file whose path matches is ignored as a whole, since
+    every object in it would match too; the rest are matched object by object against all
+    segments, so a segment like `exceptions` still ignores `handle_exceptions` in any file.
+    """
+    segments = s.split("|") if s else []
+    path_segments = [seg for seg in segments if ":" not in seg and not seg.endswith("$")]
+    return IgnoreRules(
+        paths=compile_for_path_segment("|".join(path_segments)),
+        objects=compile_for_path_segment(s),
+    )
+
+
+@dataclass(frozen=True)
 class TestsConfig:
     allow_additional: bool
     file_per_class: Pattern
     file_per_directory: Pattern
     function_for_class: Pattern
-    ignore: Pattern
+    ignore: IgnoreRules
     keep_double_underscore: bool
     unit_dir: Path
     use_filename_suffix: bool
 
 
-@dataclass
+@dataclass(frozen=True)
 class DocsConfig:
     allow_additional: bool
     file_per_directory: Pattern
     file_per_class: Pattern
-    ignore: Pattern
+    ignore: IgnoreRules
     keep_double_underscore: bool
     md_dir: Path
 
@@ -145,7 +208,7 @@ def get_tests_config(raw_pyproject: dict, project_root: Path) -> TestsConfig:
         file_per_class=compile_for_path_segment(raw_pyproject["tests"]["file_per_class"]),
         file_per_directory=compile_for_path_segment(raw_pyproject["tests"]["file_per_directory"]),
         function_for_class=compile_for_path_segment(raw_pyproject["tests"]["function_for_class"]),
-        ignore=compile_for_path_segment(raw_pyproject["tests"]["ignore"]),
+        ignore=get_ignore_rules(raw_pyproject["tests"]["ignore"]),
         keep_double_underscore=assert_bool(raw_pyproject["tests"]["keep_double_underscore"]),
         unit_dir=Path(raw_pyproject["tests"]["unit_dir"]).absolute(),
         use_filename_suffix=assert_bool(raw_pyproject["tests"]["use_filename_suffix"]),
@@ -158,7 +221,7 @@ def get_docs_config(raw_pyproject: dict, project_root: Path) -> DocsConfig:
         # compile_for_path_segment_or_bool(raw_pyproject["docs"]["allow_additional"]),
         file_per_directory=compile_for_path_segment(raw_pyproject["docs"]["file_per_directory"]),
         file_per_class=compile_for_path_segment(raw_pyproject["docs"]["file_per_class"]),
-        ignore=compile_for_path_segment(raw_pyproject["docs"]["ignore"]),
+        ignore=get_ignore_rules(raw_pyproject["docs"]["ignore"]),
         keep_double_underscore=assert_bool(raw_pyproject["docs"]["keep_double_underscore"]),
         md_dir=Path(raw_pyproject["docs"]["md_dir"]).absolute(),
     )
@@ -173,6 +236,10 @@ class Configuration:
     imports: ImportConfig
     method_order: MethodOrderConfig
     module_root_dir: Path
+    cache_dir: Path
+    collector: str
+    exclude: Pattern
+    fingerprint: str
 
 
 def get_config(project_root: Path | None = None) -> Configuration:
@@ -180,6 +247,8 @@ def get_config(project_root: Path | None = None) -> Configuration:
     raw_pyproject: dict = tomllib.loads((root_dir / "pyproject.toml").read_text())
     module_name = raw_pyproject["project"]["name"].replace("-", "_")
     raw_config = raw_pyproject["tool"]["archlint"]
+    if (collector := raw_config.get("collector", "regex")) not in {"regex", "ast"}:
+        raise ValueError(f"Unknown collector '{collector}'; expected 'regex' or 'ast'.")
 
     return Configuration(
         root_dir=root_dir,
@@ -189,4 +258,34 @@ def get_config(project_root: Path | None = None) -> Configuration:
         imports=get_import_config(raw_config, module_name),
         method_order=get_method_order_config(raw_config),
         module_root_dir=root_dir / "src" / module_name,
+        cache_dir=root_dir / raw_config.get("cache_dir", DEFAULT_CACHE_DIR),
+        collector=collector,
+        exclude=compile_for_path_segment(raw_config.get("exclude", "")),
+        fingerprint=make_fingerprint(module_name, raw_config),
+    )
+
+
+def load_config(project_root: Path | None = None) -> Configuration:
+    """
+    `get_config`, served from a pickled snapshot when nothing it depends on has changed: the text
+    of `pyproject.toml`, the archlint code and the working directory that relative paths are
+    resolved against. Otherwise the configuration is parsed and validated again, so errors in it
+    are still reported. The snapshot lives in the default cache directory, which is the only one
+    known before parsing; projects with another `cache_dir` always parse.
+    """
+    root_dir: Path = project_root or get_project_root()
+    snapshot_file = root_dir / DEFAULT_CACHE_DIR / "config.pickle"
+    key = make_fingerprint(
+        get_code_fingerprint(),
+        CACHE_FORMAT,
+        Path.cwd(),
+        root_dir,
+        hash_text((root_dir / "pyproject.toml").read_text()),
     )
+    if isinstance(cfg := load_pickle(snapshot_file, key), Configuration):
+        return cfg
+
+    cfg = get_config(root_dir)
+    if cfg.cache_dir == snapshot_file.parent:
+        save_pickle(snapshot_file, key, cfg)
+    return cfg
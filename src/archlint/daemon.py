@@ -0,0 +1,191 @@
+import json
+import os
+import socket
+import socketserver
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from .caching import hash_text, make_cache_dir
+from .changes import get_changed_scope
+from .collection import Project
+from .watching import diff_snapshots, find_changed_inputs, take_snapshot
+
+Runner = Callable[[list[str]], tuple[str, str, int]]
+
+
+class DaemonState:
+    """
+    The project kept warm between requests, including the import graph once an imports check has
+    built it. Before each request the file tree is compared with the previous snapshot and only
+    the collected objects behind changed inputs are dropped, with the graph when the source changed.
+    """
+
+    def __init__(self, project: Project, reload: Callable[[], Project]):
+        self.project = project
+        self.reload = reload
+        self.snapshot = take_snapshot(project.cfg)
+        self.requests = 0
+        self.started = time.time()
+
+    def get_project(
+        self, jobs: int = 1, changed_since: str | None = None, staged: bool = False
+    ) -> Project:
+        self.refresh()
+        self.requests += 1
+        self.project.jobs = jobs
+        self.project.changed = get_changed_scope(self.project.cfg.root_dir, changed_since, staged)
+        return self.project
+
+    def refresh(self) -> None:
+        snapshot = take_snapshot(self.project.cfg)
+        inputs = find_changed_inputs(self.project.cfg, diff_snapshots(self.snapshot, snapshot))
+        self.snapshot = snapshot
+        if "config" in inputs:
+            if self.project.cache:
+                self.project.cache.save()
+            self.project = self.reload()
+            self.snapshot = take_snapshot(self.project.cfg)
+        elif stale := inputs & {"source", "tests", "docs"}:
+            self.project.invalidate(*stale)
+
+
+class DaemonServer(socketserver.UnixStreamServer):
+    """
+    Serves one JSON request per connection, one connection at a time, so requests never race on
+    the shared project.
+    """
+
+    def __init__(self, socket_path: Path, state: DaemonState, run: Runner):
+        super().__init__(str(socket_path), DaemonRequestHandler)
+        socket_path.chmod(0o600)
+        self.state = state
+        self.run = run
+
+    def respond(self, request: dict[str, Any]) -> dict[str, Any]:
+        command = request.get("command")
+        if command == "run":
+            stdout, stderr, exit_code = self.run(request["argv"])
+            return {"stdout": stdout, "stderr": stderr, "exit_code": exit_code}
+        if command == "status":
+            return {
+                "pid": os.getpid(),
+                "root_dir": str(self.state.project.cfg.root_dir),
+                "requests": self.state.requests,
+                "uptime": time.time() - self.state.started,
+            }
+        if command == "stop":
+            # shutdown() blocks until serve_forever() returns, so it cannot run on this thread
+            threading.Thread(target=self.shutdown).start()
+            return {"stopping": True}
+        return {"error": f"Unknown daemon command: {command!r}"}
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    server: DaemonServer
+
+    def handle(self) -> None:
+        try:
+            response = self.server.respond(json.loads(self.rfile.readline()))
+        except (ValueError, KeyError, TypeError) as e:
+            response = {"error": f"Invalid daemon request: {e}"}
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+def get_socket_dir() -> Path:
+    """
+    A directory only the current user can enter, for the daemon sockets: `archlint` in
+    `$XDG_RUNTIME_DIR` or, without one, `archlint-<uid>` in the temp directory. A directory that
+    someone else created first, or that others can enter, is refused rather than used.
+    """
+    if runtime_dir := os.environ.get("XDG_RUNTIME_DIR"):
+        socket_dir = Path(runtime_dir) / "archlint"
+    else:
+        socket_dir = Path(tempfile.gettempdir()) / f"archlint-{os.getuid()}"
+    socket_dir.mkdir(mode=0o700, exist_ok=True)
+
+    st = socket_dir.lstat()
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise ValueError(
+            f"Refusing to put the daemon socket in {socket_dir}: it must be a directory owned by "
+            "the current user and closed to everyone else (mode 700)."
+        )
+    return socket_dir
+
+
+def get_socket_path(root_dir: Path) -> Path:
+    # kept out of the project tree: socket paths are limited to ~100 bytes
+    return get_socket_dir() / f"{hash_text(str(root_dir.resolve()))[:16]}.sock"
+
+
+def request_daemon(
+    socket_path: Path, request: dict[str, Any], timeout: float | None = None
+) -> dict[str, Any]:
+    if socket_path.stat().st_uid != os.getuid():
+        # whoever owns the socket would decide what the checks report
+        raise PermissionError(f"{socket_path} is not owned by the current user.")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(socket_path))
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        with sock.makefile("rb") as response:
+            line = response.readline()
+    if not line:
+        raise ConnectionError("The archlint daemon closed the connection without replying.")
+    return json.loads(line)
+
+
+def get_daemon_status(socket_path: Path) -> dict[str, Any] | None:
+    try:
+        return request_daemon(socket_path, {"command": "status"}, timeout=5)
+    except OSError:
+        return None
+
+
+def serve_daemon(socket_path: Path, state: DaemonState, run: Runner) -> None:
+    if socket_path.exists():
+        if get_daemon_status(socket_path):
+            raise ValueError(f"An archlint daemon is already listening on {socket_path}.")
+        socket_path.unlink()
+
+    with DaemonServer(socket_path, state, run) as server:
+        try:
+            server.serve_forever()
+        finally:
+            socket_path.unlink(missing_ok=True)
+            if state.project.cache:
+                state.project.cache.save()
+
+
+def start_daemon(
+    root_dir: Path, socket_path: Path, log_file: Path, timeout: float = 10.0
+) -> dict[str, Any]:
+    """
+    Start `archlint daemon run` in a new session, detached from the calling terminal, and wait
+    until it answers on `socket_path`.
+    """
+    make_cache_dir(log_file.parent)
+    with log_file.open("ab") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "archlint", "daemon", "run"],
+            cwd=root_dir,
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+            start_new_session=True,
+        )
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if status := get_daemon_status(socket_path):
+            return status
+        if (exit_code := process.poll()) is not None:
+            raise ValueError(f"The archlint daemon exited with code {exit_code}, see {log_file}.")
+        time.sleep(0.05)
+    raise ValueError(f"The archlint daemon did not start within {timeout:g} s, see {log_file}.")
@@ -1,21 +1,52 @@
 import re
+import sys
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from itertools import chain
 from pathlib import Path
-
-import grimp
-
-from .configuration import Configuration, ImportConfig, MethodOrderConfig
+from typing import TYPE_CHECKING
+
+from .caching import ImportCache
+from .collection import ObjectRecord, Objects
+from .configuration import (
+    Configuration,
+    DocsConfig,
+    IgnoreRules,
+    ImportConfig,
+    LayersConfig,
+    MethodOrderConfig,
+    TestsConfig,
+)
 from .regexes import Regex
 from .utils import (
+    ModuleTrie,
     dedup_underscores,
-    filter_with,
-    filter_without,
     move_path,
     path_matches,
-    remove_ordering_index,
 )
 
+if TYPE_CHECKING:
+    import grimp
+
 SetDict = dict[str, set[str]]
 
+TARGET_CACHE_SIZE = 65_536
+
+
+@dataclass(frozen=True, slots=True)
+class Discrepancies:
+    actual: list[ObjectRecord]
+    expected: list[ObjectRecord]
+    missing: list[ObjectRecord]
+    unexpected: list[ObjectRecord]
+    overlap: set[ObjectRecord]
+
+    @property
+    def found(self) -> bool:
+        return bool(self.missing or self.unexpected)
+
 
 def make_test_method(s: str) -> str:
     if re.search(Regex.DUNDER, s):
@@ -43,162 +74,303 @@ def make_doc_filename(p: Path) -> Path:
     return p.parent / f"{p.name.replace('.py', '')}.md"
 
 
-def make_test_method_path(
-    p: Path,
-    i: str,
-    class_name: str,
-    method_name: str,
-    file_per_class: re.Pattern,
-    file_per_directory: re.Pattern,
-) -> str:
-    if _p := path_matches(p, file_per_class):
+@lru_cache(maxsize=TARGET_CACHE_SIZE)
+def get_test_path(
+    p: Path, class_name: str, cfg: TestsConfig, module_root_dir: Path, root_dir: Path
+) -> Path:
+    """
+    The test file for objects of source file `p`, or for methods of its class `class_name`. The
+    result depends on nothing else, so it is computed once per file and class and then looked up,
+    by the tests check as well as by `find_affected_paths`.
+    """
+    p = move_path(p, module_root_dir, cfg.unit_dir, root_dir)
+    if class_name and (_p := path_matches(p, cfg.file_per_class)):
         p = _p.parent / class_name.lower()
     else:
-        p = path_matches(p, file_per_directory) or p
-
-    return f"{make_test_filename(p)}:{i}:Test{class_name}.{make_test_method(method_name)}"
-
-
-def make_doc_class_path(p: Path, i: str, class_name: str, cfg: Configuration) -> str:
-    if _p := path_matches(p, cfg.docs.file_per_class):
+        p = path_matches(p, cfg.file_per_directory) or p
+    p = make_test_filename(p)
+    return p if cfg.keep_double_underscore else Path(dedup_underscores(str(p)))
+
+
+@lru_cache(maxsize=TARGET_CACHE_SIZE)
+def get_doc_path(
+    p: Path, class_name: str, cfg: DocsConfig, module_root_dir: Path, root_dir: Path
+) -> Path:
+    """
+    The doc file for objects of source file `p`, or for its class `class_name`, computed once per
+    file and class like `get_test_path`.
+    """
+    p = move_path(p, module_root_dir, cfg.md_dir, root_dir)
+    if class_name and (_p := path_matches(p, cfg.file_per_class)):
         p = _p.parent / class_name.lower()
     else:
-        p = path_matches(p, cfg.docs.file_per_directory) or p
-
-    return f"{make_doc_filename(p)}:{i}:{class_name}"
-
-
-def make_test_function_path(p: Path, i: str, function_name: str, cfg: Configuration) -> str:
-    p = path_matches(p, cfg.tests.file_per_directory) or p
-    return f"{make_test_filename(p)}:{i}:test_{function_name}"
-
-
-def make_doc_function_path(p: Path, i: str, function_name: str, cfg: Configuration) -> str:
-    p = path_matches(p, cfg.docs.file_per_directory) or p
-    return f"{make_doc_filename(p)}:{i}:{function_name}"
-
-
-def map_to_test(s: str, cfg: Configuration) -> str:
-    path_str, i, ob = s.split(":")
-    path_ = move_path(path_str, cfg.module_root_dir, cfg.tests.unit_dir, cfg.root_dir)
-    if "." in ob:
-        class_name, method_name = ob.split(".")
-        result = make_test_method_path(
-            path_,
-            i,
-            class_name,
-            method_name,
-            cfg.tests.file_per_class,
-            cfg.tests.file_per_directory,
+        p = path_matches(p, cfg.file_per_directory) or p
+    p = make_doc_filename(p)
+    return p if cfg.keep_double_underscore else Path(dedup_underscores(str(p)))
+
+
+def map_to_test(record: ObjectRecord, cfg: Configuration) -> ObjectRecord | None:
+    if not record.owner and record.name[0].isupper():
+        return None
+    path_ = get_test_path(record.path, record.owner, cfg.tests, cfg.module_root_dir, cfg.root_dir)
+    if record.owner:
+        result = ObjectRecord(
+            path_, record.index, make_test_method(record.name), f"Test{record.owner}"
         )
-    elif ob[0].isupper():
-        return ""
     else:
-        result = make_test_function_path(path_, i, ob, cfg)
+        result = ObjectRecord(path_, record.index, f"test_{record.name}")
     if not cfg.tests.keep_double_underscore:
-        return dedup_underscores(result)
+        return replace(
+            result, name=dedup_underscores(result.name), owner=dedup_underscores(result.owner)
+        )
     return result
 
 
-def map_to_doc(s: str, cfg: Configuration) -> str:
-    path_str, i, ob = s.split(":")
-    path_ = move_path(path_str, cfg.module_root_dir, cfg.docs.md_dir, cfg.root_dir)
-    if "." in ob:
-        class_name, _ = ob.split(".")
-        result = make_doc_class_path(path_, i, class_name, cfg)
-    else:
-        result = make_doc_function_path(path_, i, ob, cfg)
+def map_to_doc(record: ObjectRecord, cfg: Configuration) -> ObjectRecord | None:
+    path_ = get_doc_path(record.path, record.owner, cfg.docs, cfg.module_root_dir, cfg.root_dir)
+    result = ObjectRecord(path_, record.index, record.owner or record.name)
     if not cfg.docs.keep_double_underscore:
-        return dedup_underscores(result)
+        return replace(result, name=dedup_underscores(result.name))
     return result
 
 
+def find_affected_paths(
+    cfg: Configuration,
+    changed: set[Path],
+    source_objects: Objects,
+    processor: Callable[[ObjectRecord], ObjectRecord | None],
+    *,
+    ignore: IgnoreRules | None = None,
+    include_methodless: bool = False,
+    existing: Iterable[Path] = (),
+) -> set[Path]:
+    """
+    Paths whose expected and actual entries may differ because of `changed`: the changed files
+    themselves and every file that objects of changed source files map to. Each changed source
+    file is also mapped through a placeholder function and a placeholder method, so deleted,
+    renamed or emptied files still mark their former counterparts. Class names of deleted files
+    are unknown, so where classes get a file of their own, every `existing` file next to where
+    the placeholder class would go is marked as well.
+    """
+    in_source = {p for p in changed if (cfg.root_dir / p).is_relative_to(cfg.module_root_dir)}
+    mapped = source_objects.apply(processor, ignore, include_methodless, paths=in_source)
+    class_dirs = set()
+    for p in (p for p in in_source if p.suffix == ".py"):
+        if function := processor(ObjectRecord(p, 0, "placeholder")):
+            mapped.append(function)
+        method = processor(ObjectRecord(p, 0, "placeholder", "Placeholder"))
+        if method and (not function or method.path != function.path):
+            class_dirs.add(method.path.parent)
+
+    return changed | {r.path for r in mapped} | {p for p in existing if p.parent in class_dirs}
+
+
 def compute_disallowed(
     allowed: SetDict,
     disallowed: SetDict,
     allowed_everywhere: set[str],
-    graph: grimp.ImportGraph,
+    graph: "grimp.ImportGraph",
+    package: str | None = None,
+    *,
+    external: bool = False,
+    cache: ImportCache | None = None,
 ) -> SetDict:
+    """
+    Rules match module paths, not substrings: a rule covers the named module and its submodules.
+    With `package`, only upstream modules inside that package are considered (outside of it with
+    `external`), which gives the internal and external views of a single graph. With `cache`,
+    modules whose upstream closure cannot have changed since the last run are not queried again.
+    """
+    in_package = ModuleTrie([package] if package else [])
+    cache_key = f"{package}:{external}"
+
+    def find_violations(module: str, names: Iterable[str], forbidden: bool) -> set[str]:
+        if cache and (violations := cache.get_result(cache_key, module)) is not None:
+            return violations
+        upstream = graph.find_upstream_modules(module)
+        relevant = upstream
+        if package is not None:
+            relevant = in_package.reject(upstream) if external else in_package.select(upstream)
+        rules = ModuleTrie(names)
+        violations = rules.select(relevant) if forbidden else rules.reject(relevant)
+        if cache:
+            cache.set_result(cache_key, module, upstream, violations)
+        return violations
+
     violations: SetDict = {s: set() for s in set(allowed) | set(disallowed)}
     if allowed and disallowed:
         print(
             "Specifying 'allowed' and 'disallowed' imports does not make sense; "
-            "using 'allowed' (restrictive)."
+            "using 'allowed' (restrictive).",
+            file=sys.stderr,
         )
-    if allowed:
-        for module, imports in allowed.items():
-            if module not in graph.modules:
-                print(f"    '{module}' is not a module or is not on the import tree.")
-                continue
-            upstream = graph.find_upstream_modules(module)
-            own_submodules = {module} | filter_with(upstream, module)
-            via_allowed = filter_without(
-                upstream,
-                imports | own_submodules | allowed_everywhere,
-            )
-            violations[module].update(via_allowed)
-    else:
-        for module, imports in disallowed.items():
-            if module not in graph.modules:
-                print(f"    '{module}' is not a module or is not on the import tree.")
-                continue
-            upstream = graph.find_upstream_modules(module)
-            via_disallowed = filter_with(upstream, imports)
-            violations[module].update(via_disallowed)
+    rules, forbidden = (allowed, False) if allowed else (disallowed, True)
+    for module, imports in rules.items():
+        if module not in graph.modules:
+            print(f"    '{module}' is not a module or is not on the import tree.", file=sys.stderr)
+            continue
+        # a module may always import itself and its own submodules
+        names = imports if forbidden else chain(imports, allowed_everywhere, [module])
+        violations[module].update(find_violations(module, names, forbidden))
 
     return violations
 
 
-def get_disallowed_imports(icfg: ImportConfig, module_name: str) -> tuple[SetDict, SetDict]:
-    internal_graph = grimp.build_graph(
-        module_name,
-        include_external_packages=False,
-        cache_dir=icfg.grimp_cache,
-    )
-    external_graph = grimp.build_graph(
+def compute_layer_violations(graph: "grimp.ImportGraph", lcfg: LayersConfig) -> SetDict:
+    """
+    Imports against the layer order, found by grimp in one batched query over all layer pairs
+    and keyed by the importing module like the allowed/disallowed violations.
+    """
+    import grimp  # noqa: PLC0415
+
+    layers = [grimp.Layer(*sorted(names), independent=lcfg.independent) for names in lcfg.layers]
+    try:
+        dependencies = graph.find_illegal_dependencies_for_layers(layers, lcfg.containers)
+    except grimp.exceptions.NoSuchContainer as e:
+        raise ValueError(f"Invalid layer container: {e}") from e
+
+    violations: SetDict = {}
+    for dependency in dependencies:
+        for route in dependency.routes:
+            for head in route.heads:
+                violations.setdefault(head, set()).update(route.tails)
+    return violations
+
+
+def build_import_graph(icfg: ImportConfig, module_name: str) -> "grimp.ImportGraph":
+    import grimp  # noqa: PLC0415 - only the imports check pays for loading grimp
+
+    # external packages are leaves of the graph, so the internal view only needs filtering
+    return grimp.build_graph(
         module_name,
         include_external_packages=True,
         cache_dir=icfg.grimp_cache,
     )
+
+
+def get_disallowed_imports(
+    icfg: ImportConfig,
+    module_name: str,
+    cache: ImportCache | None = None,
+    graph: "grimp.ImportGraph | None" = None,
+) -> tuple[SetDict, SetDict]:
+    graph = graph or build_import_graph(icfg, module_name)
+    if cache:
+        cache.update_imports(
+            {m: frozenset(graph.find_modules_directly_imported_by(m)) for m in graph.modules}
+        )
     internal_disallowed = compute_disallowed(
         icfg.allowed.internal,
         icfg.disallowed.internal,
         icfg.internal_allowed_everywhere,
-        internal_graph,
+        graph,
+        module_name,
+        cache=cache,
     )
     external_disallowed = compute_disallowed(
         icfg.allowed.external,
         icfg.disallowed.external,
         icfg.external_allowed_everywhere,
-        external_graph,
+        graph,
+        module_name,
+        external=True,
+        cache=cache,
     )
+    if icfg.layers:
+        for module, imported in compute_layer_violations(graph, icfg.layers).items():
+            internal_disallowed.setdefault(module, set()).update(imported)
 
     return internal_disallowed, external_disallowed
 
 
+def find_import_chains(
+    graph: "grimp.ImportGraph", violations: SetDict, jobs: int = 1
+) -> dict[tuple[str, str], tuple[str, ...]]:
+    """
+    The shortest import chain behind each violation. Only the violating pairs are queried, on at
+    most `jobs` threads, so nothing is spent when there are no violations.
+    """
+    pairs = [(module, upstream) for module, ups in violations.items() for upstream in sorted(ups)]
+    if not pairs:
+        return {}
+
+    from concurrent.futures import ThreadPoolExecutor  # noqa: PLC0415
+
+    with ThreadPoolExecutor(max_workers=min(jobs, len(pairs))) as executor:
+        chains = executor.map(lambda pair: graph.find_shortest_chain(*pair), pairs)
+        return {pair: chain for pair, chain in zip(pairs, chains) if chain}
+
+
 def sort_methods(method_dict: dict[str, str], cfg: MethodOrderConfig) -> list[str]:
     regex_pairs: tuple[tuple[re.Pattern, float], ...] = cfg.ordering
     normal_value: float = cfg.normal
+    classifier = cfg.classifier
 
     def classify_method(s: str) -> float:
-        for regexp, value in regex_pairs:
-            if re.search(regexp, s):
-                return value
+        if classifier is None:
+            for regexp, value in regex_pairs:
+                if re.search(regexp, s):
+                    return value
+            return normal_value
+        if (match := classifier.match(s)) and match.lastgroup:
+            return regex_pairs[int(match.lastgroup[1:])][1]
         return normal_value
 
     return sorted(method_dict, key=lambda k: classify_method(method_dict[k]))
 
 
+def sort_on_path(records: Iterable[ObjectRecord]) -> list[ObjectRecord]:
+    return sorted(records, key=lambda r: (str(r.path), r.index))
+
+
+def find_moved_entries(
+    actual: list[ObjectRecord], expected: list[ObjectRecord]
+) -> list[tuple[ObjectRecord, ObjectRecord | None]]:
+    """
+    The fewest entries of `actual` that must move to restore the order of `expected`, each with
+    the entry it belongs after (None if it belongs first in its file). Everything else is kept in
+    place: it is a longest increasing subsequence of expected positions, found by patience sorting
+    in O(n log n). Entries missing from `expected` are ignored.
+    """
+    position = {r: i for i, r in reversed(list(enumerate(expected)))}
+    entries = [(r, position[r]) for r in actual if r in position]
+
+    tails: list[int] = []  # index in `entries` of the smallest top of each pile
+    tail_positions: list[int] = []
+    previous: list[int] = [-1] * len(entries)
+    for i, (_, pos) in enumerate(entries):
+        pile = bisect_left(tail_positions, pos)
+        previous[i] = tails[pile - 1] if pile else -1
+        if pile == len(tails):
+            tails.append(i)
+            tail_positions.append(pos)
+        else:
+            tails[pile], tail_positions[pile] = i, pos
+
+    kept: set[int] = set()
+    i = tails[-1] if tails else -1
+    while i >= 0:
+        kept.add(i)
+        i = previous[i]
+
+    moved = []
+    for i, (r, pos) in enumerate(entries):
+        if i not in kept:
+            before = expected[pos - 1] if pos else None
+            moved.append((r, before if before and before.path == r.path else None))
+    return moved
+
+
 def analyze_discrepancies(
-    actual: list[str],
-    expected: list[str],
+    actual: list[ObjectRecord],
+    expected: list[ObjectRecord],
     allow_additional: bool = False,
-) -> tuple[list[str], list[str], set[str]]:
-    actual_set = set(actual := list(map(remove_ordering_index, actual)))
-    expected_set = set(expected := list(map(remove_ordering_index, expected)))
+) -> Discrepancies:
+    actual_set = set(actual)
+    expected_set = set(expected)
 
     missing = [t for t in expected if t not in actual_set]
     unexpected = [] if allow_additional else [t for t in actual if t not in expected_set]
     overlap = actual_set.intersection(expected_set)
 
-    return missing, unexpected, overlap
+    return Discrepancies(actual, expected, missing, unexpected, overlap)
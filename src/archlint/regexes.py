@@ -20,6 +20,9 @@ class Regex:
         PROPERTY = re.compile(r"@property", re.DOTALL)
         STATIC = re.compile(r"@staticmethod", re.DOTALL)
 
+    BACKREFERENCE = re.compile(r"(?<!\\)(?:\\\\)*\\[1-9]")
+    BASE_NAME = re.compile(r"[A-Za-z_][A-Za-z_0-9.]*")
+    CLASS_ARGUMENTS = re.compile(r"^class [A-Za-z_][A-Za-z_0-9]*(?:\[[^\]]*\])?\(", re.MULTILINE)
     CLASS_NAME = re.compile(r"class ([A-Za-z_][A-Za-z_0-9]+)[:\(]")
     DUNDER = re.compile("^__.+?__$")
     FUNCTION_NAME = re.compile(r"(?:^|\n)def ([^\(]+)")
@@ -33,5 +36,4 @@ class Regex:
         ),
         re.DOTALL,
     )
-    SUPER_CLASS = re.compile(r"[A-Z_][_A-Za-z_0-9]+(?=[,\[])")
     methods = Methods()
@@ -1,15 +1,20 @@
+import json
 import re
-from collections.abc import Callable
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import asdict, dataclass
 from pathlib import Path
 
+from .collection import ObjectRecord
+from .logic import Discrepancies, find_moved_entries
 from .utils import (
     Color,
     make_bar,
     make_colorize_path,
     make_double_bar,
-    remove_ordering_index,
 )
 
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+
 
 def make_methods_report(info: list[tuple[Path, str, list[str], list[str]]]) -> str:
     def make_class_report(info_tuple: tuple[Path, str, list[str], list[str]]) -> str:
@@ -38,12 +43,20 @@ def make_methods_report(info: list[tuple[Path, str, list[str], list[str]]]) -> s
     )
 
 
-def display_disallowed(disallowed: dict[str, set[str]]) -> str:
+def display_disallowed(
+    disallowed: dict[str, set[str]], chains: dict[tuple[str, str], tuple[str, ...]] | None = None
+) -> str:
     def make_line(mod_probs: tuple[str, set[str]]) -> str:
         mod, probs = mod_probs
+
+        def make_problem(prob: str) -> str:
+            if not (chain := (chains or {}).get((mod, prob))):
+                return Color.red(prob)
+            return f"{Color.red(prob)}\n            via {' -> '.join(chain)}"
+
         return (
             f"    {Color.cyan(mod)}\n\n    "
-            f"\n        {'\n        '.join(map(Color.red, sorted(probs)))}{'\n' * bool(probs)}"
+            f"\n        {'\n        '.join(map(make_problem, sorted(probs)))}{'\n' * bool(probs)}"
         )
 
     if disallowed and any(disallowed.values()):
@@ -57,78 +70,171 @@ def display_disallowed(disallowed: dict[str, set[str]]) -> str:
 
 
 def make_imports_report(
-    disallowed_internal: dict[str, set[str]], disallowed_external: dict[str, set[str]]
+    disallowed_internal: dict[str, set[str]],
+    disallowed_external: dict[str, set[str]],
+    chains: dict[tuple[str, str], tuple[str, ...]] | None = None,
 ) -> str:
     return (
         f"\n{make_double_bar(' INTERNAL MODULE IMPORTS ')}\n\n"
-        f"{display_disallowed(disallowed_internal)}\n\n"
+        f"{display_disallowed(disallowed_internal, chains)}\n\n"
         f"{make_double_bar(' EXTERNAL IMPORTS ')}\n\n"
-        f"{display_disallowed(disallowed_external)}"
+        f"{display_disallowed(disallowed_external, chains)}"
     )
 
 
-def make_missing_report(missing: list[str], painter: Callable[[str], str]) -> str:
+def make_missing_report(missing: list[ObjectRecord], painter: Callable[[str], str]) -> str:
     if not missing:
         return ""
-    return f"{make_bar(' MISSING ', Color.red)}\n\n    {'\n    '.join(map(painter, missing))}\n\n"
+    lines = "\n    ".join(painter(str(r)) for r in missing)
+    return f"{make_bar(' MISSING ', Color.red)}\n\n    {lines}\n\n"
 
 
-def make_unexpected_report(unexpected: list[str], painter: Callable[[str], str]) -> str:
+def make_unexpected_report(unexpected: list[ObjectRecord], painter: Callable[[str], str]) -> str:
     if not unexpected:
         return ""
-    return (
-        f"{make_bar(' UNEXPECTED ', Color.red)}\n\n"
-        f"    {'\n    '.join(map(painter, unexpected))}\n\n"
-    )
+    lines = "\n    ".join(painter(str(r)) for r in unexpected)
+    return f"{make_bar(' UNEXPECTED ', Color.red)}\n\n    {lines}\n\n"
 
 
 def make_ooo_report(
-    actual: list[str], expected: list[str], overlap: set[str], painter: Callable[[str], str]
+    actual: list[ObjectRecord],
+    expected: list[ObjectRecord],
+    overlap: set[ObjectRecord],
+    painter: Callable[[str], str],
 ) -> str:
-    minlen = max(map(len, overlap)) + 18 if overlap else 5
-
-    def make_line(method_pair: tuple[str, str]) -> str:
-        actual_method, expected_method = method_pair
-        if actual_method == expected_method:
-            return f"    {actual_method}"
-        else:
-            return (
-                f"    {painter(actual_method) + '  ':─<{minlen}}  "
-                f"{Color.red(expected_method.split(':')[-1])}"
-            )
-
-    actual = list(filter(lambda p: p in overlap, actual))
-    expected = list(filter(lambda p: p in overlap, expected))
-    if actual == expected:
+    """
+    Only the entries that must move to restore the expected order are listed, each with the
+    entry it belongs after, so a single misplaced entry yields a single line.
+    """
+    expected = [r for r in expected if r in overlap]
+    if not (moved := find_moved_entries([r for r in actual if r in overlap], expected)):
         return ""
-    return (
-        f"{make_bar(' ORDERING MISMATCH ', Color.red)}\n\n"
-        f"    {'\n    '.join(map(make_line, zip(actual, expected)))}\n\n"
-    )
+    minlen = max(len(str(r)) for r, _ in moved) + 18
+
+    def make_line(move: tuple[ObjectRecord, ObjectRecord | None]) -> str:
+        record, before = move
+        target = f"after {before.qualname}" if before else "first"
+        return f"    {painter(str(record)) + '  ':─<{minlen}}  {Color.red(target)}"
+
+    return f"{make_bar(' ORDERING MISMATCH ', Color.red)}\n\n{'\n'.join(map(make_line, moved))}\n\n"
 
 
 def make_discrepancy_report(
-    title: str,
-    actual: list[str],
-    expected: list[str],
-    missing: list[str],
-    unexpected: list[str],
-    overlap: set[str],
-    specific_path: Path,
-    root_dir: Path,
-):
+    title: str, discrepancies: Discrepancies, specific_path: Path, root_dir: Path
+) -> str:
     title = f" {title.upper()} "
     paint = make_colorize_path(specific_path, root_dir)
-    actual = list(map(remove_ordering_index, actual))
-    expected = list(map(remove_ordering_index, expected))
-    order_report = make_ooo_report(actual, expected, overlap, paint)
+    d = discrepancies
+    order_report = make_ooo_report(d.actual, d.expected, d.overlap, paint)
 
-    if not (missing or unexpected or order_report):
+    if not (d.missing or d.unexpected or order_report):
         return f"\n{make_double_bar(title)}\n\n    {Color.green('No problems detected.')}"
 
     return (
         f"\n{make_double_bar(title)}\n\n"
-        f"{make_missing_report(missing, paint)}"
-        f"{make_unexpected_report(unexpected, paint)}"
+        f"{make_missing_report(d.missing, paint)}"
+        f"{make_unexpected_report(d.unexpected, paint)}"
         f"{order_report}"
     ).replace("\n\n\n", "\n\n")
+
+
+# MACHINE-READABLE OUTPUT
+
+
+@dataclass(frozen=True, slots=True)
+class Violation:
+    """
+    One problem found by a check, in the form written by `--format jsonl|sarif`. Errors make the
+    run fail; warnings, like the ordering mismatches of the docs and tests checks, do not.
+    """
+
+    check: str
+    rule: str
+    level: str
+    path: str
+    name: str
+    message: str
+
+
+def iter_method_violations(
+    info: list[tuple[Path, str, list[str], list[str]]],
+) -> Iterator[Violation]:
+    for p, class_name, methods, sorted_methods in info:
+        for actual, expected in zip(methods, sorted_methods):
+            if actual != expected:
+                yield Violation(
+                    "methods",
+                    "method-order",
+                    "error",
+                    str(p),
+                    f"{class_name}.{actual}",
+                    f"'{actual}' is out of order; '{expected}' belongs here.",
+                )
+
+
+def iter_discrepancy_violations(check: str, discrepancies: Discrepancies) -> Iterator[Violation]:
+    d = discrepancies
+    for r in d.missing:
+        yield Violation(check, "missing", "error", str(r.path), r.qualname, f"'{r}' is missing.")
+    for r in d.unexpected:
+        yield Violation(
+            check, "unexpected", "error", str(r.path), r.qualname, f"'{r}' is unexpected."
+        )
+    expected = [r for r in d.expected if r in d.overlap]
+    for r, before in find_moved_entries([r for r in d.actual if r in d.overlap], expected):
+        target = f"after '{before.qualname}'" if before else "first in its file"
+        yield Violation(
+            check,
+            "ordering",
+            "warning",
+            str(r.path),
+            r.qualname,
+            f"'{r.qualname}' is out of order; it belongs {target}.",
+        )
+
+
+def iter_import_violations(
+    disallowed_internal: dict[str, set[str]],
+    disallowed_external: dict[str, set[str]],
+    chains: dict[tuple[str, str], tuple[str, ...]] | None = None,
+) -> Iterator[Violation]:
+    for rule, disallowed in (
+        ("internal-import", disallowed_internal),
+        ("external-import", disallowed_external),
+    ):
+        for mod in sorted(disallowed):
+            for prob in sorted(disallowed[mod]):
+                message = f"'{mod}' imports '{prob}', which is not allowed."
+                if chain := (chains or {}).get((mod, prob)):
+                    message += f" Chain: {' -> '.join(chain)}."
+                yield Violation("imports", rule, "error", "", mod, message)
+
+
+def write_jsonl(violations: Iterable[Violation], write: Callable[[str], object]) -> None:
+    """
+    Write one JSON object per violation as it is produced.
+    """
+    for v in violations:
+        write(json.dumps(asdict(v)) + "\n")
+
+
+def write_sarif(violations: Iterable[Violation], write: Callable[[str], object]) -> None:
+    """
+    Write a SARIF 2.1.0 log with one result per violation. The document is written piecewise,
+    so results go out as they are produced and are never held in memory together.
+    """
+    write(
+        f'{{"version": "2.1.0", "$schema": "{SARIF_SCHEMA}", '
+        '"runs": [{"tool": {"driver": {"name": "archlint"}}, "results": [\n'
+    )
+    for i, v in enumerate(violations):
+        result: dict = {
+            "ruleId": f"{v.check}/{v.rule}",
+            "level": v.level,
+            "message": {"text": v.message},
+            "locations": [{"logicalLocations": [{"fullyQualifiedName": v.name}]}],
+        }
+        if v.path:
+            result["locations"][0]["physicalLocation"] = {"artifactLocation": {"uri": v.path}}
+        write(f"{',' * bool(i)}{json.dumps(result)}\n")
+    write("]}]}\n")
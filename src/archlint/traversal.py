@@ -0,0 +1,135 @@
+import os
+import re
+from collections.abc import Iterator
+from itertools import groupby
+from pathlib import Path
+from re import Pattern
+
+from .regexes import Regex
+
+IGNORE_FILES = (".gitignore", ".archlintignore")
+PRUNED_DIRS = frozenset({".git", "__pycache__"})
+
+Rules = list[tuple[int, Pattern, bool]]
+
+
+def translate_ignore_pattern(line: str) -> str:
+    """
+    The regex for one line of a `.gitignore`-style file, matched against a path relative to the
+    file's directory, with a trailing `/` for directories. A negation translates to the pattern
+    it re-includes; blank lines and comments translate to "".
+    """
+    line = line.rstrip("\n").rstrip(" ").removeprefix("!")
+    if not line or line.startswith("#"):
+        return ""
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    anchored = "/" in line
+    line = line.lstrip("/")
+
+    body = ""
+    for token in re.findall(r"\*\*/|/\*\*|\*\*|\*|\?|\[[^\]]*\]|\\.|.", line, re.DOTALL):
+        if token == "**/":
+            body += "(?:.*/)?"
+        elif token in {"/**", "**"}:
+            body += "(?:/.*)?" if token == "/**" else ".*"
+        elif token == "*":
+            body += "[^/]*"
+        elif token == "?":
+            body += "[^/]"
+        elif token.startswith("[") and len(token) > 2:
+            body += "[^" + token[2:] if token[1] == "!" else token
+        elif token == "/":
+            # never the trailing `/` that marks directories, so `gen/*` does not match `gen/`
+            body += "/(?!$)"
+        else:
+            body += re.escape(token[-1])
+
+    return ("^" if anchored else "(?:^|.*/)") + body + ("/$" if dir_only else "/?$")
+
+
+def compile_ignore_file(text: str) -> list[tuple[Pattern, bool]]:
+    """
+    The lines of an ignore file as patterns in file order, each with whether it is a negation.
+    Consecutive lines of the same kind share one pattern, so a file without negations compiles
+    to a single one.
+    """
+    lines = [
+        (p, line.startswith("!"))
+        for line in text.splitlines()
+        if (p := translate_ignore_pattern(line))
+    ]
+    return [
+        (re.compile("|".join(p for p, _ in group)), negated)
+        for negated, group in groupby(lines, key=lambda pair: pair[1])
+    ]
+
+
+def read_ignore_rules(directory: Path, names: set[str] | None = None) -> Rules:
+    """
+    The rules of the ignore files in `directory`, each with the length of the prefix to strip
+    from an absolute path to make it relative to `directory` and whether it is a negation.
+    `names` are the entries of `directory` when already listed, to save looking for files that
+    are not there.
+    """
+    rules: Rules = []
+    for name in IGNORE_FILES:
+        if names is not None and name not in names:
+            continue
+        try:
+            text = (directory / name).read_text()
+        except OSError:
+            continue
+        prefix = len(str(directory)) + 1
+        rules.extend((prefix, pattern, negated) for pattern, negated in compile_ignore_file(text))
+    return rules
+
+
+def read_parent_ignore_rules(directory: Path, root_dir: Path) -> Rules:
+    """
+    The rules of the ignore files from `root_dir` down to the parent of `directory`, which apply
+    to `directory` before its own.
+    """
+    parents = [p for p in reversed(directory.parents) if p.is_relative_to(root_dir)]
+    return [rule for p in parents for rule in read_ignore_rules(p)]
+
+
+def walk_files(
+    directory: Path, suffix: str, root_dir: Path, exclude: Pattern = Regex.MATCH_NOTHING
+) -> Iterator[Path]:
+    """
+    Files under `directory` whose names end in `suffix`, in the order of
+    `sorted(directory.rglob(f"*{suffix}"))`, but listed one directory at a time instead of
+    materializing and sorting the whole tree. Entries matched by `exclude` (against their path
+    relative to `root_dir`) or by a `.gitignore` or `.archlintignore` in `root_dir` or below are
+    skipped, and directories among them are never entered. As with git, the last matching rule
+    of those files decides, so a negation re-includes what earlier rules ignored, but nothing
+    inside an ignored directory. Like `rglob`, it does not follow symlinks to directories.
+    """
+    root_prefix = len(str(root_dir)) + 1
+
+    def is_skipped(path: str, is_dir: bool, _rules: Rules) -> bool:
+        if exclude.search(path[root_prefix:]):
+            return True
+        marked = path + "/" if is_dir else path
+        # the last matching rule decides
+        matches = (
+            negated
+            for prefix, pattern, negated in reversed(_rules)
+            if pattern.match(marked[prefix:])
+        )
+        return not next(matches, True)
+
+    def walk(d: str, _rules: Rules) -> Iterator[Path]:
+        with os.scandir(d) as it:
+            entries = sorted(it, key=lambda e: e.name)
+        _rules = _rules + read_ignore_rules(Path(d), {e.name for e in entries})
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in PRUNED_DIRS and not is_skipped(entry.path, True, _rules):
+                    yield from walk(entry.path, _rules)
+            elif entry.name.endswith(suffix) and not is_skipped(entry.path, False, _rules):
+                yield Path(entry.path)
+
+    if directory.is_dir():
+        yield from walk(str(directory), read_parent_ignore_rules(directory, root_dir))
@@ -1,10 +1,13 @@
 import re
 from collections.abc import Callable, Iterable
 from pathlib import Path
-from typing import Any, Literal
+from typing import Any, Literal, TypeVar
 
 from archlint.regexes import Regex
 
+T = TypeVar("T")
+INLINE_FLAGS = {"i": re.IGNORECASE, "m": re.MULTILINE, "s": re.DOTALL, "x": re.VERBOSE}
+
 # PATH -----------------------------------------------------------------------
 
 
@@ -44,40 +47,67 @@ def project(single: Any, _list: list[tuple] | list[str]) -> list[tuple]:
     return [(single, *elem) if isinstance(elem, tuple) else (single, elem) for elem in _list]
 
 
-def sort_on_path(strings: Iterable[str]) -> list[str]:
-    return sorted(strings, key=lambda s: s.rsplit(":", maxsplit=1)[0])
-
-
 # SEQUENCE PROCESSING --------------------------------------------------------
 
 
-def deduplicate_ordered(strings: Iterable[str]) -> list[str]:
-    new_list = []
-    for s in strings:
-        if s not in new_list:
-            new_list.append(s)
-    return new_list
+# no type parameter list: the regex collector would take it for part of the name
+def deduplicate_ordered(strings: Iterable[T]) -> list[T]:  # noqa: UP047
+    return list(dict.fromkeys(strings))
 
 
-def filter_with(string_set: set[str], contained: str | set[str]) -> set[str]:
-    if isinstance(contained, str):
-        return {s for s in string_set if contained in s}
-    return {s for s in string_set if any(map(lambda c: c in s, contained))}
-
+class ModuleTrie:
+    """
+    Dotted module names indexed segment by segment. A module is contained if it is one of the
+    names or a submodule of one. The trie is compiled into a regex nested the same way, so a
+    lookup takes one step per segment, in C, whatever the number of names.
+    """
 
-def filter_without(string_set: set[str], contained: str | set[str]) -> set[str]:
-    if isinstance(contained, str):
-        return {s for s in string_set if contained not in s}
-    return {s for s in string_set if all(map(lambda c: c not in s, contained))}
+    def __init__(self, names: Iterable[str] = ()):
+        self.root: dict[str, dict] = {}
+        self.pattern: re.Pattern | None = None
+        for name in names:
+            self.add(name)
+
+    def __contains__(self, module: str) -> bool:
+        return self.compile().match(module) is not None
+
+    def add(self, name: str) -> None:
+        node = self.root
+        for part in name.split("."):
+            node = node.setdefault(part, {})
+        # module names have no empty segments, so "" marks the end of a name
+        node[""] = {}
+        self.pattern = None
+
+    def select(self, modules: Iterable[str]) -> set[str]:
+        match = self.compile().match
+        return {m for m in modules if match(m)}
+
+    def reject(self, modules: Iterable[str]) -> set[str]:
+        match = self.compile().match
+        return {m for m in modules if not match(m)}
+
+    def compile(self) -> re.Pattern:
+        if self.pattern is None:
+            self.pattern = re.compile(make_trie_pattern(self.root))
+        return self.pattern
+
+
+def make_trie_pattern(node: dict[str, dict]) -> str:
+    ends = [re.escape(part) for part, child in node.items() if "" in child]
+    alternatives = [
+        rf"{re.escape(part)}\.(?:{make_trie_pattern(child)})"
+        for part, child in node.items()
+        if part and "" not in child
+    ]
+    if ends:
+        alternatives.insert(0, rf"(?:{'|'.join(ends)})(?=\.|\Z)")
+    return "|".join(alternatives) or Regex.MATCH_NOTHING.pattern
 
 
 # STRING PROCESSING ----------------------------------------------------------
 
 
-def remove_ordering_index(s: str) -> str:
-    return re.sub(r":\d+:", ":", s)
-
-
 def prepend_module_name(s: str, module_name: str) -> str:
     if not s.startswith(module_name):
         return f"{module_name}.{s}"
@@ -101,6 +131,28 @@ def safe_search(p: re.Pattern, s: str, groupnum: int, fallback: str = "") -> str
     return fallback
 
 
+def make_first_match_pattern(patterns: Iterable[re.Pattern]) -> re.Pattern | None:
+    """
+    Pattern whose `match` at the start of a string sets `lastgroup` to `_<i>`, where `i` is the
+    index of the first of `patterns` that `search` would find in it, so that one call replaces a
+    loop over all of them. Each pattern keeps its own flags. Returns None for patterns that cannot
+    be combined without changing their meaning, such as ones with numbered backreferences.
+    """
+    alternatives = []
+    for i, p in enumerate(patterns):
+        if Regex.BACKREFERENCE.search(p.pattern):
+            return None
+        on = "".join(c for c, flag in INLINE_FLAGS.items() if p.flags & flag)
+        off = "".join(c for c in INLINE_FLAGS if c not in on)
+        flags = f"{on}-{off}" if off else on
+        body = f"{p.pattern}\n" if p.flags & re.VERBOSE else p.pattern
+        alternatives.append(f"(?=[\\s\\S]*?(?{flags}:{body}))(?P<_{i}>)")
+    try:
+        return re.compile("|".join(alternatives) or Regex.MATCH_NOTHING.pattern)
+    except re.error:
+        return None
+
+
 def make_regex(s: str) -> re.Pattern:
     return re.compile(re.sub(r"\\*\(", "\\(", re.sub(r"\\*\.", "\\.", s)))
 
@@ -125,6 +177,41 @@ def get_method_name(s: str) -> str:
     return safe_search(Regex.METHOD_NAME, s, 1)
 
 
+def split_class_arguments(s: str) -> list[str]:
+    """
+    The comma-separated arguments at the start of `s`, up to the parenthesis that closes them.
+    Commas and parentheses nested in brackets, such as those of `dict[str, int]`, do not count.
+    """
+    arguments = [""]
+    depth = 0
+    for char in s:
+        if char in ")]}" and depth == 0:
+            break
+        if char == "," and depth == 0:
+            arguments.append("")
+            continue
+        depth += (char in "([{") - (char in ")]}")
+        arguments[-1] += char
+    return [a for a in map(str.strip, arguments) if a]
+
+
+def parse_base_classes(class_text: str) -> list[str]:
+    """
+    The base classes in the header of `class_text`, which may span several lines, as bare names:
+    `mod.Base[T]` gives `Base`, while keyword arguments such as `metaclass=Meta` are skipped.
+    """
+    if not (start := Regex.CLASS_ARGUMENTS.search(class_text)):
+        return []
+    header = re.sub(r"#[^\n]*", "", class_text[start.end() :])
+    names: list[str] = []
+    for argument in split_class_arguments(header):
+        if argument.startswith("*") or "=" in argument.partition("[")[0]:
+            continue
+        if name := safe_search(Regex.BASE_NAME, argument, 0):
+            names.append(name.rpartition(".")[2])
+    return names
+
+
 def path_matches(p: Path | str, path_pattern: re.Pattern) -> Path | Literal[False]:
     if s := re.search(path_pattern, p := str(p)):
         dirname = s.group(0)[1:]
@@ -132,10 +219,6 @@ def path_matches(p: Path | str, path_pattern: re.Pattern) -> Path | Literal[Fals
     return False
 
 
-def path_matches_not(p: Path | str, path_pattern: re.Pattern) -> bool:
-    return not path_matches(p, path_pattern)
-
-
 # COLOR ----------------------------------------------------------------------
 
 
@@ -191,7 +274,6 @@ def make_colorize_path(specific_dir: Path, root_dir: Path) -> Callable[[str], st
 
     def colorize_path(s: str) -> str:
         new_colon = "\u001b[0m:\u001b[31m"
-        s = remove_ordering_index(s)
         s = s.replace(doc_prefix, new_doc_prefix).replace(":", new_colon) + "\u001b[0m"
         return s
 
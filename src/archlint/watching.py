@@ -0,0 +1,110 @@
+import time
+from collections.abc import Callable, Iterable
+from datetime import datetime
+from pathlib import Path
+
+from .collection import Project
+from .configuration import Configuration
+from .traversal import walk_files
+
+Check = Callable[[Project], tuple[str, bool]]
+Snapshot = dict[Path, tuple[int, int]]
+
+CHECK_INPUTS: dict[str, set[str]] = {
+    "methods": {"source"},
+    "docs": {"source", "docs"},
+    "tests": {"source", "tests"},
+    "imports": {"source"},
+}
+
+
+def take_snapshot(cfg: Configuration) -> Snapshot:
+    snapshot: Snapshot = {}
+    for directory, suffix in (
+        (cfg.module_root_dir, ".py"),
+        (cfg.tests.unit_dir, ".py"),
+        (cfg.docs.md_dir, ".md"),
+    ):
+        for p in walk_files(directory, suffix, cfg.root_dir, cfg.exclude):
+            stat = p.stat()
+            snapshot[p] = (stat.st_mtime_ns, stat.st_size)
+    if (pyproject := cfg.root_dir / "pyproject.toml").exists():
+        stat = pyproject.stat()
+        snapshot[pyproject] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> set[Path]:
+    return {p for p in old.keys() | new.keys() if old.get(p) != new.get(p)}
+
+
+def find_changed_inputs(cfg: Configuration, changed: Iterable[Path]) -> set[str]:
+    inputs: set[str] = set()
+    for p in changed:
+        if p == cfg.root_dir / "pyproject.toml":
+            inputs.add("config")
+        elif p.is_relative_to(cfg.module_root_dir):
+            inputs.add("source")
+        elif p.is_relative_to(cfg.tests.unit_dir):
+            inputs.add("tests")
+        elif p.is_relative_to(cfg.docs.md_dir):
+            inputs.add("docs")
+    return inputs
+
+
+def run_affected_checks(
+    project: Project, checks: dict[str, Check], inputs: set[str]
+) -> list[tuple[str, bool]]:
+    """
+    Forget the collected objects behind `inputs` and re-run the checks that depend on them. The
+    objects are collected again on first use, parsing only files whose cache entries are stale.
+    """
+    project.invalidate(*(inputs & {"source", "tests", "docs"}))
+    selected = [name for name in checks if "config" in inputs or CHECK_INPUTS[name] & inputs]
+    return [checks[name](project) for name in selected]
+
+
+def watch_project(
+    project: Project,
+    reload: Callable[[], Project],
+    checks: dict[str, Check],
+    *,
+    interval: float = 0.25,
+    echo: Callable[[str], None] = print,
+    max_polls: int | None = None,
+) -> None:
+    """
+    Poll the source, tests and docs trees and re-run the checks affected by each change, keeping
+    the collected objects and parse cache in memory between runs. A change to `pyproject.toml`
+    replaces the project with `reload()` and re-runs everything.
+    """
+    snapshot = take_snapshot(project.cfg)
+    for report, _ in run_affected_checks(project, checks, {"config"}):
+        echo(report)
+
+    polls = 0
+    try:
+        while max_polls is None or polls < max_polls:
+            polls += 1
+            time.sleep(interval)
+            new_snapshot = take_snapshot(project.cfg)
+            if not (changed := diff_snapshots(snapshot, new_snapshot)):
+                continue
+            snapshot = new_snapshot
+            inputs = find_changed_inputs(project.cfg, changed)
+            if "config" in inputs:
+                if project.cache:
+                    project.cache.save()
+                project = reload()
+                # the new configuration may watch other roots or exclude other files
+                snapshot = take_snapshot(project.cfg)
+
+            start = time.perf_counter()
+            reports = run_affected_checks(project, checks, inputs)
+            elapsed = (time.perf_counter() - start) * 1000
+            echo(f"\n[{datetime.now():%H:%M:%S}] {len(changed)} changed, {elapsed:.0f} ms")
+            for report, _ in reports:
+                echo(report)
+    finally:
+        if project.cache:
+            project.cache.save()
@@ -1,8 +1,13 @@
 import os
+import subprocess
+import sys
 from pathlib import Path
 
 import pytest
 
+from archlint.cli import main
+from archlint.collection import ClassInfo, FunctionInfo, Objects
+
 TEST_ROOT = Path(__file__).parent
 PROJECT_ROOT = TEST_ROOT.parent
 
@@ -28,5 +33,78 @@ def tst_root():
     return TEST_ROOT
 
 
+@pytest.fixture
+def sample_objects():
+    p = Path("src/pkg/mod.py")
+    base = ClassInfo(p, 0, "Base", ["__init__", "run"], {"__init__": "", "run": ""}, [])
+    child = ClassInfo(p, 1, "Child", ["stop"], {"stop": ""}, ["Base"])
+    return Objects([FunctionInfo(p, 2, "helper")], [base, child])
+
+
+@pytest.fixture
+def git_repo(tmp_path):
+    def git(*args: str) -> None:
+        subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True)
+
+    git("init", "-q", "-b", "main")
+    git("config", "user.email", "dev@example.com")
+    git("config", "user.name", "dev")
+    (tmp_path / "kept.py").write_text("a = 1\n")
+    (tmp_path / "edited.py").write_text("b = 1\n")
+    (tmp_path / "deleted.py").write_text("c = 1\n")
+    git("add", ".")
+    git("commit", "-q", "-m", "initial")
+
+    (tmp_path / "edited.py").write_text("b = 2\n")
+    (tmp_path / "deleted.py").unlink()
+    (tmp_path / "staged.py").write_text("d = 1\n")
+    git("add", "staged.py")
+    (tmp_path / "untracked.py").write_text("e = 1\n")
+    return tmp_path
+
+
+@pytest.fixture
+def mini_project(tmp_path, monkeypatch):
+    (tmp_path / "pyproject.toml").write_text((PROJECT_ROOT / "pyproject.toml").read_text())
+    for relative, text in (
+        ("src/archlint/mod.py", "def helper():\n    ...\n"),
+        ("tests/unit/mod_test.py", "def test_helper():\n    ...\n"),
+        ("docs/md/mod.md", "## ::: archlint.mod.helper\n"),
+    ):
+        (tmp_path / relative).parent.mkdir(parents=True)
+        (tmp_path / relative).write_text(text)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
 def patch_env(mocker, name: str, value: str) -> None:
     mocker.patch("os.environ", os.environ | {name: value})
+
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path_factory, monkeypatch):
+    # the key that caches are signed with, kept out of the real home directory
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache_home := tmp_path_factory.mktemp("cache")))
+    return cache_home
+
+
+@pytest.fixture
+def socket_dir(tmp_path_factory, monkeypatch):
+    # short enough for a socket path, and private to the test
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(runtime_dir := tmp_path_factory.mktemp("run")))
+    return runtime_dir / "archlint"
+
+
+@pytest.fixture
+def run_archlint(monkeypatch):
+    """
+    Run `archlint` in-process and return its exit code, as `main` computes it.
+    """
+
+    def run(args: list[str]) -> int:
+        monkeypatch.setattr(sys, "argv", ["archlint", *args])
+        with pytest.raises(SystemExit) as exit_info:
+            main()
+        return int(exit_info.value.code or 0)
+
+    return run
@@ -0,0 +1,237 @@
+import os
+import pickle
+from pathlib import Path
+
+from archlint.caching import (
+    ImportCache,
+    ImportEntries,
+    ParseCache,
+    get_cache_key,
+    get_code_fingerprint,
+    hash_text,
+    load_entry,
+    load_pickle,
+    make_cache_dir,
+    make_fingerprint,
+    save_pickle,
+    sign_cache,
+)
+
+
+class TestParseCache:
+    def test_entries(self, tmp_path):
+        assert ParseCache(tmp_path / "missing.pickle").entries == {}
+        (broken := tmp_path / "broken.pickle").write_bytes(b"not a pickle")
+        assert ParseCache(broken).entries == {}
+
+    def test_get(self, tmp_path):
+        calls: list[str] = []
+
+        def parser(text: str) -> str:
+            calls.append(text)
+            return text.upper()
+
+        (source := tmp_path / "module.py").write_text("abc")
+        os.utime(source, ns=(1_000_000_000, 1_000_000_000))
+        cache = ParseCache(tmp_path / "cache.pickle", "fp")
+
+        assert cache.get(source, parser) == "ABC"
+        assert cache.get(source, parser) == "ABC"
+        assert calls == ["abc"]
+
+        source.write_text("xyz")
+        os.utime(source, ns=(2_000_000_000, 2_000_000_000))
+        assert cache.get(source, parser) == "XYZ"
+        assert calls == ["abc", "xyz"]
+
+        os.utime(source, ns=(3_000_000_000, 3_000_000_000))
+        assert cache.get(source, parser) == "XYZ"
+        assert calls == ["abc", "xyz"]
+
+    def test_get_many(self, tmp_path):
+        paths = [tmp_path / f"module_{i}.py" for i in range(3)]
+        for i, p in enumerate(paths):
+            p.write_text(f"text {i}")
+        cache = ParseCache()
+        parsers = [str.upper, str.title, str.lower]
+
+        assert cache.get_many(paths, parsers) == ["TEXT 0", "Text 1", "text 2"]
+        assert cache.get_many(paths[::-1], parsers) == ["text 2", "Text 1", "TEXT 0"]
+
+    def test_is_fresh(self, tmp_path):
+        (source := tmp_path / "module.py").write_text("abc")
+        os.utime(source, ns=(1_000_000_000, 1_000_000_000))
+        cache = ParseCache()
+
+        assert not cache.is_fresh(source, str(source))
+        cache.get(source, str.upper)
+        assert cache.is_fresh(source, str(source))
+        os.utime(source, ns=(2_000_000_000, 2_000_000_000))
+        assert not cache.is_fresh(source, str(source))
+
+    def test_load_entries(self, tmp_path):
+        (source := tmp_path / "module.py").write_text("abc")
+        cache = ParseCache(cache_file := tmp_path / "cache.pickle", "fp")
+        cache.get(source, str.upper)
+        cache.save()
+
+        assert set(ParseCache(cache_file, "fp").load_entries()) == {str(source)}
+        assert ParseCache(cache_file, "other").load_entries() == {}
+
+    def test_save(self, tmp_path):
+        (source := tmp_path / "module.py").write_text("abc")
+        (gone := tmp_path / "gone.py").write_text("def")
+        cache = ParseCache(cache_file := tmp_path / "cache" / "cache.pickle", "fp")
+        cache.get(source, str.upper)
+        cache.get(gone, str.upper)
+        gone.unlink()
+        cache.save()
+
+        assert cache_file.is_file()
+        assert not cache.modified
+        assert set(ParseCache(cache_file, "fp").entries) == {str(source)}
+
+        ParseCache(None).save()
+
+
+class TestImportCache:
+    def test_entries(self, tmp_path):
+        assert ImportCache(tmp_path / "missing.pickle").entries == ImportEntries()
+
+    def test_get_result(self):
+        cache = ImportCache()
+        cache.set_result("internal", "pkg.a", {"pkg.b", "pkg.c"}, {"pkg.c"})
+        assert cache.get_result("internal", "pkg.a") is None
+
+        cache.update_imports({"pkg.a": frozenset({"pkg.b"}), "pkg.b": frozenset({"pkg.c"})})
+        assert cache.get_result("internal", "pkg.a") is None
+        cache.update_imports({"pkg.a": frozenset({"pkg.b"}), "pkg.b": frozenset({"pkg.c"})})
+        assert cache.get_result("internal", "pkg.a") == {"pkg.c"}
+        assert cache.get_result("external", "pkg.a") is None
+
+        cache.update_imports({"pkg.a": frozenset({"pkg.b"}), "pkg.b": frozenset({"pkg.d"})})
+        assert cache.get_result("internal", "pkg.a") is None
+
+    def test_set_result(self):
+        cache = ImportCache()
+        cache.set_result("internal", "pkg.a", {"pkg.b"}, set())
+        assert cache.modified
+        assert cache.entries.results == {("internal", "pkg.a"): (frozenset({"pkg.b"}), set())}
+
+    def test_update_imports(self):
+        cache = ImportCache()
+        cache.update_imports({"pkg.a": frozenset({"pkg.b"}), "pkg.b": frozenset()})
+        assert cache.changed == {"pkg.a", "pkg.b"}
+        cache.modified = False
+
+        cache.update_imports({"pkg.a": frozenset({"pkg.b"}), "pkg.c": frozenset()})
+        assert cache.changed == {"pkg.b", "pkg.c"}
+        assert cache.modified
+
+    def test_load_entries(self, tmp_path):
+        cache = ImportCache(cache_file := tmp_path / "imports.pickle", "fp")
+        cache.set_result("internal", "pkg.a", set(), set())
+        cache.save()
+
+        assert ImportCache(cache_file, "fp").load_entries() == cache.entries
+        assert ImportCache(cache_file, "other").load_entries() == ImportEntries()
+
+    def test_save(self, tmp_path):
+        cache = ImportCache(cache_file := tmp_path / "cache" / "imports.pickle", "fp")
+        cache.save()
+        assert not cache_file.exists()
+
+        cache.update_imports({"pkg.a": frozenset()})
+        cache.save()
+        assert cache_file.is_file()
+        assert not cache.modified
+
+
+def test_load_entry(tmp_path):
+    (source := tmp_path / "module.py").write_text("abc")
+    entry = load_entry(source, str.upper)
+
+    assert (entry.size, entry.digest, entry.value) == (3, hash_text("abc"), "ABC")
+    assert entry.mtime_ns == -1
+    assert load_entry(source, str.upper, known_digest=hash_text("abc")).value is None
+
+
+def test_load_pickle(tmp_path, mocker):
+    assert load_pickle(None, "fp") is None
+    assert load_pickle(tmp_path / "missing.pickle", "fp") is None
+    (broken := tmp_path / "broken.pickle").write_bytes(b"fp\nnot a pickle")
+    assert load_pickle(broken, "fp") is None
+
+    # a planted cache is rejected on its header and signature, before anything is unpickled
+    unpickle = mocker.spy(pickle, "loads")
+    payload = pickle.dumps({"a": 1})
+    (planted := tmp_path / "planted.pickle").write_bytes(b"fp\nforged\n" + payload)
+    assert load_pickle(planted, "fp") is None
+    signature = sign_cache(b"guessed key", b"fp", payload)
+    planted.write_bytes(b"fp\n" + signature + b"\n" + payload)
+    assert load_pickle(planted, "fp") is None
+    assert unpickle.call_count == 0
+
+
+def test_save_pickle(tmp_path, mocker):
+    save_pickle(cache_file := tmp_path / "cache" / "data.pickle", "fp", {"a": 1})
+
+    assert load_pickle(cache_file, "fp") == {"a": 1}
+    assert load_pickle(cache_file, "other") is None
+    assert cache_file.read_bytes().startswith(b"fp\n")
+    assert cache_file.read_bytes().split(b"\n")[1] != b""
+    assert sorted(p.name for p in cache_file.parent.iterdir()) == [".gitignore", "data.pickle"]
+
+    # a read-only checkout keeps working, without a cache
+    mocker.patch.object(Path, "write_bytes", side_effect=PermissionError("read-only"))
+    save_pickle(cache_file, "other", {"b": 2})
+    assert load_pickle(cache_file, "fp") == {"a": 1}
+
+
+def test_sign_cache():
+    signature = sign_cache(b"key", b"fp", b"payload")
+    assert signature == sign_cache(b"key", b"fp", b"payload")
+    assert signature != sign_cache(b"other", b"fp", b"payload")
+    assert signature != sign_cache(b"key", b"other", b"payload")
+    assert b"\n" not in signature
+
+
+def test_make_cache_dir(tmp_path):
+    make_cache_dir(cache_dir := tmp_path / "a" / "cache")
+    assert (cache_dir / ".gitignore").read_text().splitlines()[-1] == "*"
+
+    (cache_dir / ".gitignore").write_text("kept\n")
+    make_cache_dir(cache_dir)
+    assert (cache_dir / ".gitignore").read_text() == "kept\n"
+
+
+def test_get_cache_key(cache_home, tmp_path, mocker):
+    key = get_cache_key()
+    assert key and key == get_cache_key()
+    assert ((cache_home / "archlint" / "cache.key").stat().st_mode & 0o777) == 0o600
+
+    # signed with the key of another user, a cache is rejected
+    save_pickle(cache_file := tmp_path / "data.pickle", "fp", {"a": 1})
+    (cache_home / "archlint" / "cache.key").write_text("another user")
+    assert load_pickle(cache_file, "fp") is None
+
+    # without a key, nothing is cached
+    mocker.patch("os.open", side_effect=PermissionError("read-only"))
+    (cache_home / "archlint" / "cache.key").unlink()
+    assert get_cache_key() is None
+    save_pickle(cache_file, "fp", {"a": 1})
+    assert load_pickle(cache_file, "fp") is None
+
+
+def test_get_code_fingerprint():
+    assert get_code_fingerprint() == get_code_fingerprint()
+
+
+def test_hash_text():
+    assert hash_text("abc") == hash_text("abc")
+    assert hash_text("abc") != hash_text("abd")
+
+
+def test_make_fingerprint():
+    assert make_fingerprint("1.0", {"a": 1, "b": 2}) == make_fingerprint("1.0", {"b": 2, "a": 1})
+    assert make_fingerprint("1.0", {"a": 1}) != make_fingerprint("1.1", {"a": 1})
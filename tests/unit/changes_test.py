@@ -0,0 +1,36 @@
+from pathlib import Path
+
+import pytest
+
+from archlint.changes import get_changed_files, get_changed_scope, run_git
+
+
+def test_run_git(git_repo):
+    assert "kept.py" in run_git(git_repo, "ls-files")
+    with pytest.raises(ValueError, match="git rev-parse"):
+        run_git(git_repo, "rev-parse", "no-such-ref")
+
+
+def test_get_changed_files(git_repo):
+    assert get_changed_files(git_repo, staged=True) == {Path("staged.py")}
+    assert get_changed_files(git_repo, since="HEAD") == {
+        Path("edited.py"),
+        Path("deleted.py"),
+        Path("staged.py"),
+        Path("untracked.py"),
+    }
+    assert get_changed_files(git_repo) == set()
+
+    run_git(git_repo, "mv", "kept.py", "moved.py")
+    assert get_changed_files(git_repo, staged=True) == {
+        Path("staged.py"),
+        Path("kept.py"),
+        Path("moved.py"),
+    }
+
+
+def test_get_changed_scope(git_repo):
+    assert get_changed_scope(git_repo) is None
+    assert get_changed_scope(git_repo, staged=True) == {Path("staged.py")}
+    (git_repo / "pyproject.toml").write_text("")
+    assert get_changed_scope(git_repo, since="HEAD") is None
@@ -1,6 +1,17 @@
+import itertools
+import json
 import re
+import subprocess
+import sys
+from pathlib import Path
 
-from archlint.cli import main
+from click.testing import CliRunner
+
+import archlint
+from archlint.cli import archlint_cli, main, make_project, run_in_daemon, run_with_daemon
+from archlint.collection import Project
+from archlint.configuration import get_config
+from archlint.daemon import DaemonState
 
 
 def test_main(capsys):
@@ -10,6 +21,78 @@ def test_main(capsys):
     assert len(re.findall(r"[a-z-_]+ version: \d+\.\d+", text)) == 3
 
 
+def test_make_project(mini_project):
+    project = make_project(jobs=2)
+    assert project.cfg.root_dir == mini_project
+    assert project.cfg.cache_dir.is_relative_to(mini_project)
+    assert (project.jobs, project.changed) == (2, None)
+    assert project.cache is not None
+
+
+def test_run_checks(mini_project, capsys):
+    (mini_project / "src/archlint/mod.py").write_text(
+        "def helper():\n    ...\n\n\ndef other():\n    ...\n"
+    )
+
+    assert archlint_cli.main(["--format", "jsonl", "docs"], standalone_mode=False)
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["other"]
+
+    assert archlint_cli.main(["--format", "sarif", "tests"], standalone_mode=False)
+    results = json.loads(capsys.readouterr().out)["runs"][0]["results"]
+    assert [r["ruleId"] for r in results] == ["tests/missing"]
+
+    assert archlint_cli.main(["methods"], standalone_mode=False) is False
+    assert "METHOD ORDER" in capsys.readouterr().out
+
+    # every format decides the exit code from the same findings, on clean and broken trees
+    for command, broken in itertools.product(["all", "docs", "imports"], [True, False]):
+        (mini_project / "src/archlint/mod.py").write_text(
+            "def helper():\n    ...\n\n\ndef other():\n    ...\n"
+            if broken
+            else "def helper():\n    ...\n"
+        )
+        results = [
+            CliRunner().invoke(archlint_cli, ["--format", f, command], standalone_mode=False)
+            for f in ("text", "jsonl", "sarif")
+        ]
+        assert [r.exception for r in results] == [None] * 3
+        assert [r.return_value for r in results] == [broken and command != "imports"] * 3
+
+
+def test_run_with_daemon(mini_project, capsys, mocker):
+    assert run_with_daemon(["methods"]) == 0
+    captured = capsys.readouterr()
+    assert "No archlint daemon is running" in captured.err
+    assert "No problems detected" in captured.out
+
+    response = {"stdout": '{"check": "docs"}\n', "stderr": "Specifying...\n", "exit_code": 1}
+    mocker.patch("archlint.daemon.request_daemon", return_value=response)
+    assert run_with_daemon(["--format", "jsonl", "docs"]) == 1
+    captured = capsys.readouterr()
+    assert (captured.out, captured.err) == ('{"check": "docs"}\n', "Specifying...\n")
+
+
+def test_run_in_daemon(mini_project, mocker):
+    build = mocker.spy(archlint, "build_import_graph")
+    project = Project(get_config(mini_project))
+    state = DaemonState(project, lambda: project)
+
+    stdout, stderr, exit_code = run_in_daemon(state, ["methods"])
+    assert (exit_code, state.requests, stderr) == (0, 1, "")
+    assert "No problems detected" in stdout
+
+    stdout, stderr, exit_code = run_in_daemon(state, ["--format", "jsonl", "imports"])
+    assert "Specifying 'allowed' and 'disallowed'" in stderr
+    assert all(json.loads(line) for line in stdout.splitlines())
+    run_in_daemon(state, ["imports"])
+    assert build.call_count == 1
+
+    stdout, stderr, exit_code = run_in_daemon(state, ["watch"])
+    assert (exit_code, stdout) == (2, "")
+    assert "cannot be run through the daemon" in stderr
+
+
 def test_archlint_cli():
     # TODO
     ...
@@ -30,11 +113,90 @@ def test_imports():
     ...
 
 
-def test_methods():
-    # TODO
-    ...
+def test_methods(mini_project):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "archlint", "methods"],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    assert result.returncode == 0
+    assert "No problems detected" in result.stdout
+
+    imported = set(re.findall(r"import time: +\d+ \| +\d+ \| +(\S+)", result.stderr))
+    assert "archlint.cli" in imported
+    assert not {"grimp", "concurrent.futures.process", "archlint.daemon"} & imported
 
 
 def test_tests():
     # TODO
     ...
+
+
+def test_watch(mini_project, mocker):
+    result = CliRunner().invoke(archlint_cli, ["--format", "jsonl", "watch"])
+    assert result.exit_code == 2
+    assert "'watch' only writes text reports" in result.output
+
+    watch_project = mocker.patch("archlint.watching.watch_project", side_effect=KeyboardInterrupt)
+    result = CliRunner().invoke(archlint_cli, ["watch", "--interval", "0.5"])
+    assert result.exit_code == 0
+    project, _, checks = watch_project.call_args.args
+    assert project.cfg.root_dir == mini_project
+    assert set(checks) == {"methods", "docs", "tests", "imports"}
+    assert watch_project.call_args.kwargs["interval"] == 0.5
+
+    # a project reloaded after a configuration change keeps the incremental scope
+    changed = {Path("src/archlint/mod.py")}
+    get_changed_scope = mocker.patch("archlint.cli.get_changed_scope", return_value=changed)
+    result = CliRunner().invoke(archlint_cli, ["--changed-since", "main", "watch"])
+    assert result.exit_code == 0
+    _, reload, _ = watch_project.call_args.args
+    assert reload().changed == changed
+    assert get_changed_scope.call_args.args == (mini_project, "main", False)
+
+
+def test_daemon(mini_project):
+    result = CliRunner().invoke(archlint_cli, ["daemon"])
+    assert result.exit_code == 2
+    assert all(command in result.output for command in ("start", "stop", "status", "run"))
+
+
+def test_start_daemon_command(mini_project, socket_dir, run_archlint):
+    runner = CliRunner()
+    result = runner.invoke(archlint_cli, ["daemon", "start"])
+    try:
+        assert result.exit_code == 0
+        assert "archlint daemon running (pid" in result.output
+        assert next(socket_dir.glob("*.sock"))
+
+        # a second start finds the running daemon instead of spawning another one
+        again = runner.invoke(archlint_cli, ["daemon", "start"])
+        assert again.output == result.output
+        assert run_archlint(["daemon", "status"]) == 0
+    finally:
+        result = runner.invoke(archlint_cli, ["daemon", "stop"])
+
+    assert result.output == "archlint daemon stopped.\n"
+    assert run_archlint(["daemon", "status"]) == 1
+
+
+def test_stop_daemon_command(mini_project, socket_dir):
+    result = CliRunner().invoke(archlint_cli, ["daemon", "stop"])
+    assert (result.exit_code, result.output) == (0, "No archlint daemon is running.\n")
+
+
+def test_daemon_status_command(mini_project, socket_dir, run_archlint, capsys):
+    assert run_archlint(["daemon", "status"]) == 1
+    assert capsys.readouterr().out == "No archlint daemon is running.\n"
+
+
+def test_run_daemon_command(mini_project, socket_dir, mocker):
+    serve_daemon = mocker.patch("archlint.daemon.serve_daemon")
+    result = CliRunner().invoke(archlint_cli, ["daemon", "run"])
+
+    assert result.exit_code == 0
+    socket_path, state, _ = serve_daemon.call_args.args
+    assert socket_path.parent == socket_dir
+    assert f"listening on {socket_path}" in result.output
+    assert state.project.cfg.root_dir == mini_project
@@ -1,31 +1,135 @@
-# from archlint import
+import ast
+import re
+from dataclasses import replace
+from pathlib import Path
+
+import grimp
+from hypothesis import given
+from hypothesis import strategies as st
+
+from archlint.caching import ParseCache
+from archlint.collection import (
+    MIN_FILES_PER_JOB,
+    ClassInfo,
+    FunctionInfo,
+    ObjectRecord,
+    Objects,
+    Project,
+    add_inherited_methods,
+    collect_class_info_ast,
+    collect_file_objects,
+    collect_file_objects_ast,
+    collect_method_info,
+    collect_objects_in_md,
+    collect_source_objects,
+    map_parallel,
+    resolve_base_classes,
+)
+from archlint.configuration import get_config, get_ignore_rules
+from archlint.regexes import Regex
+
+
+class TestObjectRecord:
+    def test_qualname(self):
+        assert ObjectRecord(Path("mod.py"), 0, "run", "Base").qualname == "Base.run"
+        assert ObjectRecord(Path("mod.py"), 0, "helper").qualname == "helper"
+
+    def test_dunder_str(self):
+        record = ObjectRecord(Path("src/pkg/mod.py"), 3, "run", "Base")
+        assert str(record) == "src/pkg/mod.py:Base.run"
+        assert record == ObjectRecord(Path("src/pkg/mod.py"), 7, "run", "Base")
+        assert record != ObjectRecord(Path("src/pkg/mod.py"), 3, "run")
 
 
 class TestObjects:
-    def test_function_strings(self):
-        # TODO
-        ...
+    def test_function_records(self, sample_objects):
+        assert sample_objects.function_records == [
+            ObjectRecord(Path("src/pkg/mod.py"), 2, "helper")
+        ]
+        assert sample_objects.function_records is sample_objects.function_records
+
+    def test_method_records(self, sample_objects):
+        p = Path("src/pkg/mod.py")
+        assert [(r.path, r.index, r.owner, r.name) for r in sample_objects.method_records] == [
+            (p, 0, "Base", "__init__"),
+            (p, 0, "Base", "run"),
+            (p, 1, "Child", "stop"),
+            (p, 1, "Child", "__init__"),
+            (p, 1, "Child", "run"),
+        ]
+
+    def test_records(self, sample_objects):
+        assert sample_objects.records == (
+            sample_objects.method_records + sample_objects.function_records
+        )
+
+    def test_methodless(self, sample_objects):
+        objects = Objects([], [ClassInfo(Path("mod.py"), 4, "Empty", [], {}, [])])
+        assert objects.methodless == [ObjectRecord(Path("mod.py"), 4, "Empty")]
+        assert sample_objects.methodless == []
+
+    def test_apply(self, sample_objects):
+        def rename(record: ObjectRecord) -> ObjectRecord | None:
+            return None if record.name == "run" else replace(record, name=record.name.upper())
+
+        ignore = get_ignore_rules(":helper")
+        assert [str(r) for r in sample_objects.apply(rename, ignore)] == [
+            "src/pkg/mod.py:Base.__INIT__",
+            "src/pkg/mod.py:Child.STOP",
+            "src/pkg/mod.py:Child.__INIT__",
+        ]
+        assert sample_objects.apply(rename, get_ignore_rules("mod.py")) == []
+        assert [r.name for r in sample_objects.apply(rename, get_ignore_rules("Base|init"))] == [
+            "STOP",
+            "HELPER",
+        ]
+        assert sample_objects.apply(rename, paths={Path("src/pkg/other.py")}) == []
+
 
-    def test_method_strings(self):
-        # TODO
-        ...
+class TestProject:
+    def test_source(self, project_root):
+        project = Project(get_config(project_root))
+        assert project.source is project.source
+        assert "Project" in {c.name for c in project.source.classes}
 
-    def test_strings(self):
-        # TODO
-        ...
+    def test_tests(self, project_root):
+        project = Project(get_config(project_root))
+        assert "TestProject" in {c.name for c in project.tests.classes}
 
-    def test_methodless(self):
-        # TODO
-        ...
+    def test_docs(self, project_root):
+        project = Project(get_config(project_root))
+        assert "Project" in {f.name for f in project.docs.functions}
 
-    def test_apply(self):
-        # TODO
-        ...
+    def test_import_cache(self, project_root, tmp_path):
+        cfg = get_config(project_root)
+        assert Project(cfg).import_cache.cache_file is None
+
+        project = Project(cfg, ParseCache(tmp_path / "parse.pickle", "fp"))
+        assert project.import_cache is project.import_cache
+        assert project.import_cache.cache_file == tmp_path / "imports.pickle"
+        assert project.import_cache.fingerprint != "fp"
+
+    def test_invalidate(self, project_root):
+        project = Project(get_config(project_root))
+        project.import_graph = graph = grimp.ImportGraph()
+        project.invalidate("docs")
+        assert project.import_graph is graph
+        source, tests = project.source, project.tests
+        project.invalidate("source")
+        assert project.source is not source
+        assert project.tests is tests
+        assert project.import_graph is None
+        project.invalidate()
+        assert project.tests is not tests
 
 
 def test_collect_method_info():
-    # TODO
-    ...
+    class_text = (
+        "class Child(\n    Base[T],\n    metaclass=Meta,\n):\n"
+        "    x: dict[str, Other]\n\n    def run(self):\n        ...\n"
+    )
+    name, methods, _, super_classes = collect_method_info(class_text)
+    assert (name, methods, super_classes) == ("Child", ["run"], ["Base"])
 
 
 def test_parse_function():
@@ -33,9 +137,20 @@ def test_parse_function():
     ...
 
 
-def test_collect_objects_in_md():
-    # TODO
-    ...
+@given(st.lists(st.sampled_from(["## ::: a.b.f", "# ::: a.C", "::: x", "text", "#  ::: a.g", ""])))
+def test_collect_objects_in_md(lines):
+    text = "\n".join(lines)
+    assert collect_objects_in_md(text) == list(enumerate(re.findall(Regex.OBJECT_IN_MD, text)))
+
+    text = (
+        "# archlint.mod\n\nProse mentioning ::: in passing.\n"
+        "## ::: archlint.mod.helper\n"
+        "text ### ::: archlint.mod.Inline\n"
+        "## ::: Upper.case\n"
+        "## ::: archlint.mod.last"
+    )
+    assert collect_objects_in_md(text) == [(0, "helper"), (1, "Inline")]
+    assert collect_objects_in_md(text, str.islower) == [(0, "helper")]
 
 
 def test_collect_docs_objects():
@@ -48,11 +163,113 @@ def test_collect_object_texts():
     ...
 
 
-def test_collect_source_objects():
-    # TODO
-    ...
+def test_collect_file_objects():
+    source = (
+        "import re\n\n\n"
+        "def first(x):\n    return x\n\n\n"
+        "class Second(Base, Other):\n"
+        "    def __init__(self):\n        pass\n\n"
+        "    @property\n    def value(self):\n        return 1\n\n\n"
+    )
+    functions, classes = collect_file_objects(source, p := Path("src/pkg/mod.py"))
+
+    assert functions == [FunctionInfo(p, 0, "first")]
+    assert [(c.index, c.name, c.methods) for c in classes] == [(1, "Second", ["__init__", "value"])]
+    assert classes[0].super_classes == ["Base", "Other"]
+
+    source = "class Child(Base[T], metaclass=Meta):\n    x: dict[str, Other]\n"
+    _, classes = collect_file_objects(source, p)
+    assert classes[0].super_classes == ["Base"]
+
+
+def test_collect_class_info_ast():
+    source = (
+        "class Second(base.Base, Other[int]):\n"
+        "    def __init__(self):\n        pass\n"
+        "    @property\n    def value(\n        self,\n    ) -> int:\n        return 1\n\n"
+        "    async def fetch(self): ...\n"
+    )
+    node = ast.parse(source).body[0]
+    name, methods, method_dict, super_classes = collect_class_info_ast(node, source.splitlines())
+
+    assert (name, methods, super_classes) == (
+        "Second",
+        ["__init__", "value", "fetch"],
+        ["Base", "Other"],
+    )
+    assert method_dict["value"] == "@property\n    def value(\n        self,\n    ) -> int"
+    assert method_dict["fetch"] == "async def fetch(self)"
+
+
+def test_collect_file_objects_ast():
+    source = (
+        "import re\n\n\n"
+        "def first(x):\n    return x\n\n\n"
+        "class Second(Base, Other):\n"
+        "    def __init__(self):\n        pass\n\n"
+        "    @property\n    def value(self):\n        return 1\n\n\n"
+        "async def third():\n    pass\n"
+    )
+    functions, classes = collect_file_objects_ast(source, p := Path("src/pkg/mod.py"))
+    _, regex_classes = collect_file_objects(source, p)
+
+    assert functions == [FunctionInfo(p, 0, "first"), FunctionInfo(p, 2, "third")]
+    assert [c.methods for c in classes] == [c.methods for c in regex_classes]
+    assert classes[0].method_dict == regex_classes[0].method_dict
+    assert classes[0].super_classes == ["Base", "Other"]
+    assert collect_file_objects_ast("def broken(:\n", p) == collect_file_objects(
+        "def broken(:\n", p
+    )
+
+
+def test_collect_source_objects(project_root):
+    src_dir = project_root / "src"
+    serial = collect_source_objects(src_dir, project_root, jobs=1)
+    parallel = collect_source_objects(src_dir, project_root, jobs=4)
+
+    assert serial.functions == parallel.functions
+    assert serial.classes == parallel.classes
+
+    ast_objects = collect_source_objects(src_dir, project_root, collector="ast")
+    assert ast_objects.functions == serial.functions
+    assert [c.methods for c in ast_objects.classes] == [c.methods for c in serial.classes]
+
+
+def test_map_parallel():
+    words = [f"word{i}" for i in range(4 * MIN_FILES_PER_JOB)]
+
+    assert map_parallel(str.upper, words, jobs=1) == [w.upper() for w in words]
+    assert map_parallel(str.upper, words, jobs=4) == [w.upper() for w in words]
+    assert map_parallel(pow, [2, 3], [3, 2], jobs=4) == [8, 9]
+
+
+def test_resolve_base_classes():
+    a, b = Path("a.py"), Path("b.py")
+    classes = [
+        ClassInfo(a, 0, "Base", [], {}, []),
+        ClassInfo(b, 0, "Base", [], {}, []),
+        ClassInfo(b, 1, "Child", [], {}, ["Base", "Unknown", "Child"]),
+        ClassInfo(a, 1, "Other", [], {}, ["Base", "Child"]),
+    ]
+
+    assert resolve_base_classes(classes) == [[], [], [1], [0, 2]]
 
 
 def test_add_inherited_methods():
-    # TODO
-    ...
+    p, q = Path("a.py"), Path("b.py")
+    classes = [
+        ClassInfo(p, 0, "A", ["a", "shared"], {}, []),
+        ClassInfo(p, 1, "B", ["b"], {}, ["A"]),
+        ClassInfo(p, 2, "C", ["c", "shared"], {}, ["B", "Missing"]),
+        ClassInfo(p, 3, "D", ["d"], {}, ["C", "A"]),
+        ClassInfo(q, 0, "A", ["other"], {}, []),
+        ClassInfo(q, 1, "E", ["e"], {}, ["A", "F"]),
+        ClassInfo(q, 2, "F", ["f"], {}, ["E"]),
+    ]
+    resolved = {(c.path, c.name): c.methods for c in add_inherited_methods(classes)}
+
+    assert resolved[p, "B"] == ["b", "a", "shared"]
+    assert resolved[p, "C"] == ["c", "shared", "b", "a"]
+    assert resolved[p, "D"] == ["d", "c", "shared", "b", "a"]
+    assert resolved[q, "E"] == ["e", "other", "f"]
+    assert resolved[q, "F"] == ["f"]
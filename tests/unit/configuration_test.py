@@ -1,3 +1,30 @@
+import pytest
+
+from archlint.configuration import (
+    IgnoreRules,
+    LayersConfig,
+    get_config,
+    get_ignore_rules,
+    get_layers_config,
+    load_config,
+)
+from archlint.regexes import Regex
+
+
+def test_get_layers_config():
+    assert get_layers_config({}, "pkg") is None
+    assert get_layers_config(
+        {"layers": {"order": ["cli", "daemon | watching", "utils"]}}, "pkg"
+    ) == LayersConfig([{"cli"}, {"daemon", "watching"}, {"utils"}], {"pkg"}, True)
+
+    lcfg = get_layers_config(
+        {"layers": {"order": ["a"], "containers": ["sub", "pkg.other"], "independent": False}},
+        "pkg",
+    )
+    assert lcfg is not None
+    assert (lcfg.containers, lcfg.independent) == ({"pkg.sub", "pkg.other"}, False)
+
+
 def test_get_import_config():
     # TODO
     ...
@@ -8,6 +35,21 @@ def test_get_method_order_config():
     ...
 
 
+def test_get_ignore_rules():
+    rules = get_ignore_rules("exceptions.py|:_[A-Z]|__init__$|_abcs")
+
+    assert rules.paths.search("src/pkg/exceptions.py")
+    assert rules.paths.search("src/pkg/_abcs/base.py")
+    assert not rules.paths.search("src/pkg/mod.py")
+    assert not rules.paths.search("src/pkg/mod.py:_Private")
+    assert rules.objects.search("src/pkg/mod.py:_Private")
+    assert rules.objects.search("src/pkg/mod.py:Class.__init__")
+    assert rules.objects.search("src/pkg/exceptions.py:Class.run")
+    assert not rules.objects.search("src/pkg/mod.py:Class.run")
+    assert get_ignore_rules("exceptions").objects.search("src/pkg/mod.py:handle_exceptions")
+    assert get_ignore_rules("") == IgnoreRules(Regex.MATCH_NOTHING, Regex.MATCH_NOTHING)
+
+
 def test_get_tests_config():
     # TODO
     ...
@@ -21,3 +63,18 @@ def test_get_docs_config():
 def test_get_config():
     # TODO
     ...
+
+
+def test_load_config(mini_project, mocker):
+    parse = mocker.patch("archlint.configuration.get_config", side_effect=get_config)
+    cfg = load_config(mini_project)
+
+    assert (mini_project / ".archlint_cache" / "config.pickle").is_file()
+    assert load_config(mini_project) == cfg
+    assert parse.call_count == 1
+
+    pyproject = mini_project / "pyproject.toml"
+    pyproject.write_text(pyproject.read_text().replace("use_filename_suffix = true", "x = 1"))
+    with pytest.raises(KeyError, match="use_filename_suffix"):
+        load_config(mini_project)
+    assert parse.call_count == 2
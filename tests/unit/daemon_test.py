@@ -0,0 +1,167 @@
+import os
+import threading
+
+import pytest
+
+from archlint.collection import Project
+from archlint.configuration import get_config
+from archlint.daemon import (
+    DaemonServer,
+    DaemonState,
+    get_daemon_status,
+    get_socket_dir,
+    get_socket_path,
+    request_daemon,
+    serve_daemon,
+    start_daemon,
+)
+
+
+class TestDaemonState:
+    def test_get_project(self, mini_project):
+        project = Project(get_config(mini_project))
+        state = DaemonState(project, lambda: project)
+
+        assert state.get_project(jobs=3) is project
+        assert (project.jobs, project.changed, state.requests) == (3, None, 1)
+
+    def test_refresh(self, mini_project):
+        project = Project(get_config(mini_project))
+        reloaded = Project(get_config(mini_project))
+        state = DaemonState(project, lambda: reloaded)
+        source, docs = project.source, project.docs
+
+        state.refresh()
+        assert (project.source, project.docs) == (source, docs)
+        assert project.source is source
+
+        doc_file = mini_project / "docs/md/mod.md"
+        doc_file.write_text("## ::: archlint.mod.helper\n## ::: archlint.mod.other\n")
+        os.utime(doc_file, ns=(1_000_000_000, 1_000_000_000))
+        state.refresh()
+        assert project.source is source
+        assert len(project.docs.functions) == 2
+
+        (mini_project / "pyproject.toml").write_text(
+            (mini_project / "pyproject.toml").read_text() + "\n"
+        )
+        state.refresh()
+        assert state.project is reloaded
+
+
+class TestDaemonServer:
+    def test_respond(self, mini_project, tmp_path_factory):
+        project = Project(get_config(mini_project))
+        state = DaemonState(project, lambda: project)
+        socket_path = tmp_path_factory.mktemp("socket") / "daemon.sock"
+
+        def run(argv: list[str]) -> tuple[str, str, int]:
+            return " ".join(argv), "warning\n", len(argv)
+
+        with DaemonServer(socket_path, state, run) as server:
+            assert server.respond({"command": "run", "argv": ["a", "b"]}) == {
+                "stdout": "a b",
+                "stderr": "warning\n",
+                "exit_code": 2,
+            }
+            assert server.respond({"command": "status"})["pid"] == os.getpid()
+            assert "error" in server.respond({"command": "restart"})
+        assert (socket_path.stat().st_mode & 0o777) == 0o600
+
+
+class TestDaemonRequestHandler:
+    def test_handle(self, mini_project, tmp_path_factory):
+        project = Project(get_config(mini_project))
+        socket_path = tmp_path_factory.mktemp("socket") / "daemon.sock"
+
+        with DaemonServer(socket_path, DaemonState(project, lambda: project), print) as server:
+            thread = threading.Thread(target=server.handle_request)
+            thread.start()
+            response = request_daemon(socket_path, {"command": "run"}, timeout=5)
+            thread.join()
+        assert response == {"error": "Invalid daemon request: 'argv'"}
+
+
+def test_get_socket_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    socket_dir = get_socket_dir()
+    assert socket_dir == tmp_path / "archlint"
+    assert (socket_dir.stat().st_mode & 0o777) == 0o700
+
+    socket_dir.chmod(0o755)
+    with pytest.raises(ValueError, match="Refusing"):
+        get_socket_dir()
+
+    monkeypatch.delenv("XDG_RUNTIME_DIR")
+    assert get_socket_dir().name == f"archlint-{os.getuid()}"
+
+
+def test_get_socket_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    assert get_socket_path(tmp_path).parent == tmp_path / "archlint"
+    assert get_socket_path(tmp_path) == get_socket_path(tmp_path / "." / "")
+    assert get_socket_path(tmp_path) != get_socket_path(tmp_path / "other")
+    assert len(str(get_socket_path(tmp_path / ("long" * 50)))) < 100
+
+
+def test_request_daemon(tmp_path, mocker):
+    with pytest.raises(FileNotFoundError):
+        request_daemon(tmp_path / "missing.sock", {"command": "status"})
+
+    (planted := tmp_path / "planted.sock").write_text("")
+    mocker.patch("archlint.daemon.os.getuid", return_value=os.getuid() + 1)
+    with pytest.raises(PermissionError, match="not owned by the current user"):
+        request_daemon(planted, {"command": "status"})
+
+
+def test_get_daemon_status(tmp_path):
+    assert get_daemon_status(tmp_path / "missing.sock") is None
+
+
+def test_serve_daemon(mini_project, tmp_path_factory):
+    project = Project(get_config(mini_project))
+    state = DaemonState(project, lambda: project)
+    socket_path = tmp_path_factory.mktemp("socket") / "daemon.sock"
+    socket_path.write_text("stale")
+
+    thread = threading.Thread(
+        target=serve_daemon, args=(socket_path, state, lambda argv: ("report\n", "", 1))
+    )
+    thread.start()
+    for _ in range(100):
+        if get_daemon_status(socket_path):
+            break
+        thread.join(0.05)
+
+    assert request_daemon(socket_path, {"command": "run", "argv": []}) == {
+        "stdout": "report\n",
+        "stderr": "",
+        "exit_code": 1,
+    }
+    with pytest.raises(ValueError, match="already listening"):
+        serve_daemon(socket_path, state, lambda argv: ("", "", 0))
+    request_daemon(socket_path, {"command": "stop"})
+    thread.join(5)
+    assert not thread.is_alive()
+    assert not socket_path.exists()
+
+
+def test_start_daemon(mini_project, tmp_path_factory, monkeypatch):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path_factory.mktemp("run")))
+    socket_path = get_socket_path(mini_project)
+    log_file = mini_project / ".archlint_cache" / "daemon.log"
+
+    status = start_daemon(mini_project, socket_path, log_file)
+    try:
+        assert status["root_dir"] == str(mini_project)
+        response = request_daemon(socket_path, {"command": "run", "argv": ["methods"]}, timeout=30)
+        assert response["exit_code"] == 0
+        assert "No problems detected" in response["stdout"]
+        assert socket_path.parent == get_socket_dir()
+    finally:
+        request_daemon(socket_path, {"command": "stop"}, timeout=5)
+
+    (broken := mini_project / "broken").mkdir()
+    (broken / "pyproject.toml").write_text("not toml")
+    with pytest.raises(ValueError, match="exited with code 1"):
+        start_daemon(broken, get_socket_path(broken), log_file)
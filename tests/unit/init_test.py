@@ -1,4 +1,27 @@
-# from hello_world import
+import itertools
+from pathlib import Path
+
+import pytest
+
+from archlint import (
+    find_docs_discrepancies,
+    find_import_problems,
+    find_method_order_problems,
+    find_tests_discrepancies,
+    has_import_problems,
+    iter_violations,
+)
+from archlint.collection import ObjectRecord, Project
+from archlint.configuration import get_config
+
+
+def test_find_method_order_problems(mini_project):
+    (mini_project / "src/archlint/mod.py").write_text(
+        "class Widget:\n    def run(self):\n        ...\n\n    def __init__(self):\n        ...\n"
+    )
+    assert find_method_order_problems(Project(get_config(mini_project))) == [
+        (Path("src/archlint/mod.py"), "Widget", ["run", "__init__"], ["__init__", "run"])
+    ]
 
 
 def test_check_method_order():
@@ -6,16 +29,60 @@ def test_check_method_order():
     ...
 
 
+def test_find_docs_discrepancies(mini_project):
+    (mini_project / "docs/md/mod.md").write_text("## ::: archlint.mod.gone\n")
+    discrepancies = find_docs_discrepancies(Project(get_config(mini_project)))
+
+    assert discrepancies.missing == [ObjectRecord(Path("docs/md/mod.md"), 0, "helper")]
+    assert discrepancies.unexpected == [ObjectRecord(Path("docs/md/mod.md"), 0, "gone")]
+
+
 def test_check_docs_structure():
     # TODO
     ...
 
 
+def test_find_tests_discrepancies(mini_project):
+    discrepancies = find_tests_discrepancies(Project(get_config(mini_project)))
+    assert not discrepancies.found
+    assert discrepancies.overlap == {ObjectRecord(Path("tests/unit/mod_test.py"), 0, "test_helper")}
+
+
 def test_check_tests_structure():
     # TODO
     ...
 
 
+def test_find_import_problems(project_root):
+    internal, external, chains = find_import_problems(Project(get_config(project_root)))
+    assert not any(internal.values())
+    assert not any(external.values())
+    assert chains is None
+
+
+def test_has_import_problems():
+    assert not has_import_problems({"pkg.utils": set()}, {})
+    assert has_import_problems({}, {"pkg.utils": {"pydantic"}})
+
+
 def test_check_imports():
     # TODO
     ...
+
+
+def test_iter_violations(mini_project):
+    (mini_project / "tests/unit/mod_test.py").write_text("def test_gone():\n    ...\n")
+    project = Project(get_config(mini_project))
+
+    violations = iter_violations(project, "tests")
+    assert [(v.check, v.rule, v.name) for v in itertools.islice(violations, 2)] == [
+        ("tests", "missing", "test_helper"),
+        ("tests", "unexpected", "test_gone"),
+    ]
+    with pytest.raises(StopIteration) as stop:
+        next(violations)
+    assert stop.value.value is True
+
+    with pytest.raises(StopIteration) as stop:
+        next(iter_violations(project, "methods"))
+    assert stop.value.value is False
@@ -1,3 +1,43 @@
+import re
+from dataclasses import replace
+from functools import partial
+from pathlib import Path
+
+import grimp
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+from archlint.caching import ImportCache
+from archlint.collection import ObjectRecord, Project
+from archlint.configuration import LayersConfig, get_config
+from archlint.logic import (
+    Discrepancies,
+    analyze_discrepancies,
+    build_import_graph,
+    compute_disallowed,
+    compute_layer_violations,
+    find_affected_paths,
+    find_import_chains,
+    find_moved_entries,
+    get_disallowed_imports,
+    get_doc_path,
+    get_test_path,
+    map_to_doc,
+    map_to_test,
+    sort_methods,
+    sort_on_path,
+)
+from archlint.utils import compile_for_path_segment
+
+
+class TestDiscrepancies:
+    def test_found(self):
+        record = ObjectRecord(Path("docs/md/mod.md"), 0, "helper")
+        assert Discrepancies([], [record], [record], [], set()).found
+        assert not Discrepancies([record], [record], [], [], {record}).found
+
+
 def test_make_test_method():
     # TODO
     ...
@@ -18,51 +58,237 @@ def test_make_doc_filename():
     ...
 
 
-def test_make_test_method_path():
-    # TODO
-    ...
+def test_get_test_path(project_root):
+    cfg = get_config(project_root)
+    args = (cfg.tests, cfg.module_root_dir, cfg.root_dir)
+    get_test_path.cache_clear()
 
+    assert get_test_path(Path("src/archlint/collection.py"), "", *args) == Path(
+        "tests/unit/collection_test.py"
+    )
+    assert get_test_path(Path("src/archlint/__init__.py"), "Project", *args) == Path(
+        "tests/unit/init_test.py"
+    )
+    get_test_path(Path("src/archlint/collection.py"), "", *args)
+    assert get_test_path.cache_info().hits == 1
 
-def test_make_doc_class_path():
-    # TODO
-    ...
+    per_class = replace(cfg.tests, file_per_class=re.compile("/[^/]*?pkg[^/]*?"))
+    assert get_test_path(
+        Path("src/archlint/pkg/mod.py"), "Base", per_class, cfg.module_root_dir, cfg.root_dir
+    ) == Path("tests/unit/base_test.py")
 
 
-def test_make_test_function_path():
-    # TODO
-    ...
+def test_get_doc_path(project_root):
+    cfg = get_config(project_root)
+    args = (cfg.docs, cfg.module_root_dir, cfg.root_dir)
 
+    assert get_doc_path(Path("src/archlint/logic.py"), "", *args) == Path("docs/md/logic.md")
+    assert get_doc_path(Path("src/archlint/utils/a__b.py"), "", *args) == Path("docs/md/utils.md")
+    collapsed = replace(cfg.docs, keep_double_underscore=False)
+    assert get_doc_path(
+        Path("src/archlint/a__b.py"), "", collapsed, cfg.module_root_dir, cfg.root_dir
+    ) == Path("docs/md/a_b.md")
 
-def test_make_doc_function_path():
-    # TODO
-    ...
 
+def test_map_to_test(project_root):
+    cfg = get_config(project_root)
+    p = Path("src/archlint/collection.py")
 
-def test_map_to_test():
-    # TODO
-    ...
+    assert map_to_test(ObjectRecord(p, 4, "__str__", "ObjectRecord"), cfg) == ObjectRecord(
+        Path("tests/unit/collection_test.py"), 4, "test_dunder_str", "TestObjectRecord"
+    )
+    assert map_to_test(ObjectRecord(p, 9, "map_parallel"), cfg) == ObjectRecord(
+        Path("tests/unit/collection_test.py"), 9, "test_map_parallel"
+    )
+    assert map_to_test(ObjectRecord(p, 4, "Objects"), cfg) is None
 
 
-def test_map_to_doc():
-    # TODO
-    ...
+def test_map_to_doc(project_root):
+    cfg = get_config(project_root)
+    p = Path("src/archlint/collection.py")
+
+    assert map_to_doc(ObjectRecord(p, 4, "__str__", "ObjectRecord"), cfg) == ObjectRecord(
+        Path("docs/md/collection.md"), 4, "ObjectRecord"
+    )
+    assert map_to_doc(ObjectRecord(p, 9, "map_parallel"), cfg) == ObjectRecord(
+        Path("docs/md/collection.md"), 9, "map_parallel"
+    )
+
+
+def test_find_affected_paths(mini_project):
+    cfg = get_config(mini_project)
+    project = Project(cfg)
+    processor = partial(map_to_test, cfg=cfg)
+    changed = {Path("src/archlint/mod.py"), Path("src/archlint/gone.py"), Path("README.md")}
+    existing = [r.path for r in project.tests.records]
+
+    assert find_affected_paths(cfg, changed, project.source, processor, existing=existing) == {
+        Path("src/archlint/mod.py"),
+        Path("src/archlint/gone.py"),
+        Path("README.md"),
+        Path("tests/unit/mod_test.py"),
+        Path("tests/unit/gone_test.py"),
+    }
+
+    per_class = replace(cfg.tests, file_per_class=compile_for_path_segment("shapes"))
+    cfg = replace(cfg, tests=per_class)
+    processor = partial(map_to_test, cfg=cfg)
+    (mini_project / "src/archlint/shapes").mkdir()
+    (mini_project / "src/archlint/shapes/round.py").write_text(
+        "class Circle:\n    def area(self):\n        ...\n"
+    )
+    (mini_project / "tests/unit/circle_test.py").write_text(
+        "class TestCircle:\n    def test_area(self):\n        ...\n"
+    )
+    changed = {Path("src/archlint/shapes/round.py")}
+    assert Path("tests/unit/circle_test.py") in find_affected_paths(
+        cfg, changed, Project(cfg).source, processor
+    )
+
+    (mini_project / "src/archlint/shapes/round.py").unlink()
+    project = Project(cfg)
+    existing = [r.path for r in project.tests.records]
+    assert not project.source.classes
+    assert Path("tests/unit/circle_test.py") not in find_affected_paths(
+        cfg, changed, project.source, processor
+    )
+    assert Path("tests/unit/circle_test.py") in find_affected_paths(
+        cfg, changed, project.source, processor, existing=existing
+    )
 
 
 def test_compute_disallowed():
-    # TODO
-    ...
+    graph = grimp.ImportGraph()
+    graph.add_import(importer="pkg.a", imported="pkg.b")
+    graph.add_import(importer="pkg.b", imported="pkg.c")
+    graph.add_module("click", is_squashed=True)
+    graph.add_import(importer="pkg.b", imported="click")
 
+    assert compute_disallowed({"pkg.a": {"pkg.b"}}, {}, set(), graph, "pkg") == {"pkg.a": {"pkg.c"}}
+    assert compute_disallowed({"pkg.a": {"pkg.b"}}, {}, set(), graph) == {
+        "pkg.a": {"pkg.c", "click"}
+    }
+    assert compute_disallowed({"pkg.a": set()}, {}, set(), graph, "pkg", external=True) == {
+        "pkg.a": {"click"}
+    }
+    assert compute_disallowed({}, {"pkg.a": {"click"}}, set(), graph) == {"pkg.a": {"click"}}
+    assert compute_disallowed({}, {"pkg.a": {"cli", "pkg.b.x"}}, set(), graph) == {"pkg.a": set()}
 
-def test_get_disallowed_imports():
-    # TODO
-    ...
 
+def test_compute_layer_violations():
+    graph = grimp.ImportGraph()
+    for module in ("pkg", "pkg.high", "pkg.mid", "pkg.low", "pkg.side"):
+        graph.add_module(module)
+    graph.add_import(importer="pkg.high.a", imported="pkg.mid.b")
+    graph.add_import(importer="pkg.low.c", imported="pkg.high.d")
+    graph.add_import(importer="pkg.low.e", imported="pkg.mid.x")
+    graph.add_import(importer="pkg.mid.x", imported="pkg.high.f")
+    graph.add_import(importer="pkg.mid.y", imported="pkg.side.z")
+    lcfg = LayersConfig([{"high"}, {"mid", "side"}, {"low"}], {"pkg"}, independent=True)
 
-def test_sort_methods():
-    # TODO
-    ...
+    assert compute_layer_violations(graph, lcfg) == {
+        "pkg.low.c": {"pkg.high.d"},
+        "pkg.low.e": {"pkg.mid.x"},
+        "pkg.mid.x": {"pkg.high.f"},
+        "pkg.mid.y": {"pkg.side.z"},
+    }
+    lcfg.independent = False
+    assert "pkg.mid.y" not in compute_layer_violations(graph, lcfg)
+    lcfg.containers = {"pkg.missing"}
+    with pytest.raises(ValueError, match="container"):
+        compute_layer_violations(graph, lcfg)
+
+
+def test_build_import_graph(project_root):
+    cfg = get_config(project_root)
+    graph = build_import_graph(cfg.imports, cfg.module_name)
+    assert "archlint.cli" in graph.modules
+    assert "click" in graph.modules
+
+
+def test_get_disallowed_imports(project_root):
+    cfg = get_config(project_root)
+    cache = ImportCache()
+
+    first = get_disallowed_imports(cfg.imports, cfg.module_name, cache)
+    assert cache.changed
+    assert cache.entries.results
+
+    second = get_disallowed_imports(cfg.imports, cfg.module_name, cache)
+    assert cache.changed == set()
+    assert second == first == get_disallowed_imports(cfg.imports, cfg.module_name)
+
+
+def test_find_import_chains():
+    graph = grimp.ImportGraph()
+    graph.add_import(importer="pkg.a", imported="pkg.b")
+    graph.add_import(importer="pkg.b", imported="pkg.c")
+    graph.add_import(importer="pkg.a", imported="pkg.d")
+
+    assert find_import_chains(graph, {}) == {}
+    assert find_import_chains(graph, {"pkg.a": {"pkg.c", "pkg.d"}, "pkg.c": {"pkg.a"}}, 4) == {
+        ("pkg.a", "pkg.c"): ("pkg.a", "pkg.b", "pkg.c"),
+        ("pkg.a", "pkg.d"): ("pkg.a", "pkg.d"),
+    }
+
+
+def test_sort_methods(project_root):
+    cfg = get_config(project_root).method_order
+    headers = {
+        "plain": "    def plain(self):",
+        "_private": "    def _private(self):",
+        "__init__": "    def __init__(self):",
+        "name": "    @property\n    def name(self):",
+        "check_all": "    def check_all(self):",
+        "__eq__": "    def __eq__(self, other):",
+        "create": "    @classmethod\n    def create(cls):",
+        "_cached": "    @property\n    def _cached(self):",
+    }
+    expected = ["__init__", "name", "__eq__", "create", "plain", "check_all", "_private", "_cached"]
+
+    assert cfg.classifier is not None
+    assert sort_methods(headers, cfg) == expected
+    assert sort_methods(headers, replace(cfg, classifier=None)) == expected
+
+
+def test_sort_on_path():
+    a, b = Path("tests/unit/a_test.py"), Path("tests/unit/b_test.py")
+    records = [ObjectRecord(b, 0, "x"), ObjectRecord(a, 2, "y"), ObjectRecord(a, 1, "z")]
+
+    assert [r.name for r in sort_on_path(records)] == ["z", "y", "x"]
+
+
+@given(st.permutations(range(8)), st.sets(st.integers(0, 7)))
+def test_find_moved_entries(order, dropped):
+    p = Path("docs/md/mod.md")
+    expected = [ObjectRecord(p, i, f"f{i}") for i in range(8)]
+    actual = [expected[i] for i in order if i not in dropped]
+    moved = find_moved_entries(actual, expected)
+
+    # a longest increasing subsequence, by the quadratic textbook recurrence
+    lengths: list[int] = []
+    for i, r in enumerate(actual):
+        before = [lengths[j] for j in range(i) if actual[j].index < r.index]
+        lengths.append(max(before, default=0) + 1)
+    assert len(moved) == len(actual) - max(lengths, default=0)
+
+    kept = [r for r in actual if r not in {m for m, _ in moved}]
+    assert kept == sorted(kept, key=lambda r: r.index)
+    for r, before in moved:
+        assert before == (expected[r.index - 1] if r.index else None)
+    assert find_moved_entries(expected, expected) == []
 
 
 def test_analyze_discrepancies():
-    # TODO
-    ...
+    p = Path("tests/unit/mod_test.py")
+    actual = [ObjectRecord(p, 0, "test_a"), ObjectRecord(p, 5, "test_b")]
+    expected = [ObjectRecord(p, 1, "test_b"), ObjectRecord(p, 2, "test_c")]
+
+    assert analyze_discrepancies(actual, expected) == Discrepancies(
+        actual,
+        expected,
+        [ObjectRecord(p, 2, "test_c")],
+        [ObjectRecord(p, 0, "test_a")],
+        {ObjectRecord(p, 1, "test_b")},
+    )
+    assert analyze_discrepancies(actual, expected, allow_additional=True).unexpected == []
@@ -1,3 +1,21 @@
+import json
+import re
+from pathlib import Path
+
+from archlint.collection import ObjectRecord
+from archlint.logic import Discrepancies
+from archlint.reporting import (
+    Violation,
+    display_disallowed,
+    iter_discrepancy_violations,
+    iter_import_violations,
+    iter_method_violations,
+    make_discrepancy_report,
+    make_ooo_report,
+    write_jsonl,
+    write_sarif,
+)
+
 # from archlint import
 
 
@@ -7,8 +25,14 @@ def test_make_methods_report():
 
 
 def test_display_disallowed():
-    # TODO
-    ...
+    disallowed = {"pkg.a": {"pkg.c", "pkg.b"}, "pkg.d": set()}
+    text = re.sub(r"\x1b\[[0-9;]*m", "", display_disallowed(disallowed))
+    assert text == "    pkg.a\n\n        pkg.b\n        pkg.c\n"
+
+    chains = {("pkg.a", "pkg.c"): ("pkg.a", "pkg.b", "pkg.c")}
+    text = re.sub(r"\x1b\[[0-9;]*m", "", display_disallowed(disallowed, chains))
+    assert "        pkg.c\n            via pkg.a -> pkg.b -> pkg.c\n" in text
+    assert "No problems detected" in display_disallowed({"pkg.a": set()})
 
 
 def test_make_imports_report():
@@ -27,10 +51,99 @@ def test_make_unexpected_report():
 
 
 def test_make_ooo_report():
-    # TODO
-    ...
+    p = Path("docs/md/mod.md")
+    a, b, c, d, e = (ObjectRecord(p, i, name) for i, name in enumerate("abcde"))
 
+    assert make_ooo_report([a, b], [a, b], {a, b}, str) == ""
+    report = make_ooo_report([e, a, b, c, d], [a, b, c, d, e], {a, b, c, d, e}, str)
+    assert "    docs/md/mod.md:e  ─" in report
+    assert report.count("docs/md/mod.md:") == 1
+    assert "\u001b[31mafter d\u001b[0m" in report
+    assert "\u001b[31mfirst\u001b[0m" in make_ooo_report([b, c, a], [a, b, c], {a, b, c}, str)
 
-def test_make_discrepancy_report():
-    # TODO
-    ...
+
+def test_make_discrepancy_report(tmp_path):
+    p = Path("docs/md/mod.md")
+    actual = [ObjectRecord(p, 0, "a"), ObjectRecord(p, 3, "extra")]
+    expected = [ObjectRecord(p, 0, "a"), ObjectRecord(p, 1, "b")]
+    discrepancies = Discrepancies(actual, expected, expected[1:], actual[1:], {expected[0]})
+
+    report = make_discrepancy_report("docs", discrepancies, tmp_path / "docs/md", tmp_path)
+    assert " DOCS " in report
+    assert "mod.md\u001b[0m:\u001b[31mb" in report.split(" UNEXPECTED ")[0]
+    assert "mod.md\u001b[0m:\u001b[31mextra" in report.split(" UNEXPECTED ")[1]
+    clean = Discrepancies(expected, expected, [], [], set(expected))
+    assert "No problems detected" in make_discrepancy_report(
+        "docs", clean, tmp_path / "docs/md", tmp_path
+    )
+
+
+def test_iter_method_violations():
+    info = [(Path("src/pkg/mod.py"), "A", ["run", "__init__", "stop"], ["__init__", "run", "stop"])]
+    violations = list(iter_method_violations(info))
+
+    assert [(v.rule, v.level, v.path, v.name) for v in violations] == [
+        ("method-order", "error", "src/pkg/mod.py", "A.run"),
+        ("method-order", "error", "src/pkg/mod.py", "A.__init__"),
+    ]
+
+
+def test_iter_discrepancy_violations():
+    p = Path("docs/md/mod.md")
+    a, b, c, d = (ObjectRecord(p, i, name) for i, name in enumerate("abcd"))
+    discrepancies = Discrepancies([b, a, d], [a, b, c], [c], [d], {a, b})
+
+    assert [
+        (v.rule, v.level, v.name) for v in iter_discrepancy_violations("docs", discrepancies)
+    ] == [
+        ("missing", "error", "c"),
+        ("unexpected", "error", "d"),
+        ("ordering", "warning", "b"),
+    ]
+
+
+def test_iter_import_violations():
+    chains = {("pkg.a", "pkg.c"): ("pkg.a", "pkg.b", "pkg.c")}
+    violations = list(iter_import_violations({"pkg.a": {"pkg.c"}}, {"pkg.b": {"click"}}, chains))
+
+    assert [(v.rule, v.path, v.name) for v in violations] == [
+        ("internal-import", "", "pkg.a"),
+        ("external-import", "", "pkg.b"),
+    ]
+    assert "pkg.a -> pkg.b -> pkg.c" in violations[0].message
+
+
+def test_write_jsonl():
+    written: list[str] = []
+    violations = [
+        Violation("docs", "ordering", "warning", "docs/md/mod.md", "a", "out of order"),
+        Violation("docs", "missing", "error", "docs/md/mod.md", "b", "missing"),
+    ]
+
+    write_jsonl(violations[:1], written.append)
+    write_jsonl(violations, written.append)
+    assert [json.loads(line)["name"] for line in written] == ["a", "a", "b"]
+
+
+def test_write_sarif():
+    written: list[str] = []
+    violations = iter(
+        [
+            Violation("imports", "internal-import", "error", "", "pkg.a", "not allowed"),
+            Violation("docs", "missing", "error", "docs/md/mod.md", "b", "missing"),
+        ]
+    )
+
+    write_sarif(violations, written.append)
+    log = json.loads("".join(written))
+    results = log["runs"][0]["results"]
+    assert log["version"] == "2.1.0"
+    assert [r["ruleId"] for r in results] == ["imports/internal-import", "docs/missing"]
+    assert "physicalLocation" not in results[0]["locations"][0]
+    assert results[1]["locations"][0]["physicalLocation"]["artifactLocation"]["uri"] == (
+        "docs/md/mod.md"
+    )
+
+    written.clear()
+    write_sarif([], written.append)
+    assert json.loads("".join(written))["runs"][0]["results"] == []
@@ -0,0 +1,111 @@
+import re
+
+from archlint.traversal import (
+    compile_ignore_file,
+    read_ignore_rules,
+    read_parent_ignore_rules,
+    translate_ignore_pattern,
+    walk_files,
+)
+from archlint.utils import compile_for_path_segment
+
+
+def test_translate_ignore_pattern():
+    def matches(line: str, path: str) -> bool:
+        return bool(re.match(translate_ignore_pattern(line), path))
+
+    assert translate_ignore_pattern("") == translate_ignore_pattern("# comment") == ""
+    assert translate_ignore_pattern("!keep.py") == translate_ignore_pattern("keep.py")
+    assert matches("build/", "build/")
+    assert matches("build/", "src/build/")
+    assert not matches("build/", "build")
+    assert matches("/build", "build/")
+    assert not matches("/build", "src/build/")
+    assert matches("*.py", "src/gen.py")
+    assert not matches("src/*.py", "src/pkg/gen.py")
+    assert matches("src/*", "src/gen/")
+    assert not matches("src/*", "src/")
+    assert matches("src/**/gen.py", "src/gen.py")
+    assert matches("src/**/gen.py", "src/a/b/gen.py")
+    assert matches("fixture?", "fixture1/")
+    assert matches("[!a]x.py", "bx.py")
+    assert not matches("[!a]x.py", "ax.py")
+    assert matches(r"\#hash", "#hash")
+
+
+def test_compile_ignore_file():
+    assert compile_ignore_file("# nothing\n\n") == []
+    [(pattern, negated)] = compile_ignore_file("generated/\n*.tmp.py\n")
+    assert pattern.match("pkg/generated/")
+    assert pattern.match("x.tmp.py")
+    assert not pattern.match("x.py")
+    assert not negated
+
+    rules = compile_ignore_file("gen/*\n!gen/keep.py\n!gen/also.py\n*.tmp\n")
+    assert [negated for _, negated in rules] == [False, True, False]
+    assert rules[1][0].match("gen/also.py")
+
+
+def test_read_ignore_rules(tmp_path):
+    (tmp_path / ".gitignore").write_text("a/\n")
+    (tmp_path / ".archlintignore").write_text("b/\n")
+
+    rules = read_ignore_rules(tmp_path)
+    assert [prefix for prefix, _, _ in rules] == [len(str(tmp_path)) + 1] * 2
+    assert read_ignore_rules(tmp_path, {".archlintignore"})[0][1].match("b/")
+    (tmp_path / ".gitignore").write_text("a/\n!a/\n")
+    assert [negated for _, _, negated in read_ignore_rules(tmp_path)] == [False, True, False]
+    assert read_ignore_rules(tmp_path / "missing") == []
+
+
+def test_read_parent_ignore_rules(tmp_path):
+    (tmp_path / ".gitignore").write_text("generated/\n")
+    (tmp_path / "src" / "pkg").mkdir(parents=True)
+    (tmp_path / "src" / ".gitignore").write_text("pkg/legacy/\n")
+
+    rules = read_parent_ignore_rules(tmp_path / "src" / "pkg", tmp_path)
+    assert len(rules) == 2
+    assert all(
+        pattern.match(path) for (_, pattern, _), path in zip(rules, ["generated/", "pkg/legacy/"])
+    )
+    assert read_parent_ignore_rules(tmp_path, tmp_path / "src") == []
+
+
+def test_walk_files(tmp_path):
+    for relative in (
+        "src/a.py",
+        "src/a/b.py",
+        "src/a-b.py",
+        "src/B.py",
+        "src/notes.md",
+        "src/__pycache__/a.py",
+        "src/generated/big.py",
+        "src/pkg/vendored/lib.py",
+        "src/pkg/legacy.py",
+        "src/pkg/kept.py",
+    ):
+        (tmp_path / relative).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / relative).write_text("")
+    src = tmp_path / "src"
+
+    unfiltered = sorted(p for p in src.rglob("*.py") if "__pycache__" not in p.parts)
+    assert list(walk_files(src, ".py", tmp_path)) == unfiltered
+
+    (tmp_path / ".gitignore").write_text("generated/\n")
+    (src / "pkg" / ".archlintignore").write_text("legacy.py\n")
+    walked = walk_files(src, ".py", tmp_path, compile_for_path_segment("vendored"))
+    assert [p.relative_to(src).as_posix() for p in walked] == [
+        "B.py",
+        "a/b.py",
+        "a-b.py",
+        "a.py",
+        "pkg/kept.py",
+    ]
+    assert list(walk_files(tmp_path / "missing", ".py", tmp_path)) == []
+
+    for relative in ("src/pkg/gen/a.py", "src/pkg/gen/keep.py", "src/pkg/gen/sub/keep.py"):
+        (tmp_path / relative).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / relative).write_text("")
+    (tmp_path / ".gitignore").write_text("src/pkg/gen/*\n!src/pkg/gen/keep.py\n!keep.py\n")
+    walked = walk_files(src / "pkg", ".py", tmp_path, compile_for_path_segment("vendored"))
+    assert [p.relative_to(src).as_posix() for p in walked] == ["pkg/gen/keep.py", "pkg/kept.py"]
@@ -1,3 +1,18 @@
+import re
+
+from hypothesis import given
+from hypothesis import strategies as st
+
+from archlint.utils import (
+    ModuleTrie,
+    deduplicate_ordered,
+    make_colorize_path,
+    make_first_match_pattern,
+    make_trie_pattern,
+    parse_base_classes,
+    split_class_arguments,
+)
+
 # from archlint.utils import under_any
 
 
@@ -33,29 +48,62 @@ def test_project():
     ...
 
 
-def test_sort_on_path():
-    # TODO
-    ...
+@given(st.lists(st.sampled_from("abcde") | st.text(max_size=3)))
+def test_deduplicate_ordered(strings):
+    expected: list[str] = []
+    for s in strings:
+        if s not in expected:
+            expected.append(s)
 
+    assert deduplicate_ordered(strings) == expected
+    assert deduplicate_ordered(iter(strings)) == expected
 
-def test_deduplicate_ordered():
-    # TODO
-    ...
 
+class TestModuleTrie:
+    def test_dunder_contains(self):
+        trie = ModuleTrie(["pkg.utils", "re"])
 
-def test_filter_with():
-    # TODO
-    ...
+        assert "pkg.utils" in trie
+        assert "pkg.utils.sub" in trie
+        assert "re" in trie
+        assert "pkg" not in trie
+        assert "pkg.myutils" not in trie
+        assert "requests" not in trie
+        assert "pkg" not in ModuleTrie()
 
+    @given(st.lists(st.from_regex(r"[a-c]{1,2}(\.[a-c]{1,2}){0,2}", fullmatch=True)))
+    def test_add(self, names):
+        trie = ModuleTrie()
+        for name in names:
+            trie.add(name)
 
-def test_filter_without():
-    # TODO
-    ...
+        for name in names:
+            assert name in trie
+            assert f"{name}.sub" in trie
+        for candidate in ("a", "a.b", "b.c.a", "abc"):
+            expected = any(candidate == n or candidate.startswith(f"{n}.") for n in names)
+            assert (candidate in trie) == expected
 
+    def test_select(self):
+        trie = ModuleTrie(["pkg.a", "ext"])
+        assert trie.select({"pkg.a.x", "pkg.ab", "ext", "extra"}) == {"pkg.a.x", "ext"}
+
+    def test_reject(self):
+        trie = ModuleTrie(["pkg.a", "ext"])
+        assert trie.reject({"pkg.a.x", "pkg.ab", "ext", "extra"}) == {"pkg.ab", "extra"}
+        assert ModuleTrie().reject({"pkg"}) == {"pkg"}
+
+    def test_compile(self):
+        trie = ModuleTrie(["pkg.a"])
+        assert trie.compile() is trie.compile()
+        trie.add("pkg.b")
+        assert trie.compile().match("pkg.b.c")
 
-def test_remove_ordering_index():
-    # TODO
-    ...
+
+def test_make_trie_pattern():
+    assert make_trie_pattern({}) == "(?!)"
+    pattern = make_trie_pattern(ModuleTrie(["a.b", "a.b.c", "a.cd", "e"]).root)
+    assert pattern == r"(?:e)(?=\.|\Z)|a\.(?:(?:b|cd)(?=\.|\Z))"
 
 
 def test_prepend_module_name():
@@ -78,6 +126,26 @@ def test_safe_search():
     ...
 
 
+FIRST_MATCH_PATTERNS = [
+    re.compile("a.b", re.DOTALL),
+    re.compile("a.b"),
+    re.compile("^b|c$"),
+    re.compile("@x.+?def _", re.DOTALL),
+    re.compile("C", re.IGNORECASE),
+]
+
+
+@given(st.text("abcCx@ _\n", max_size=12) | st.sampled_from(["a\nb", "b", "@x\ndef _y", "c\n"]))
+def test_make_first_match_pattern(s):
+    pattern = make_first_match_pattern(FIRST_MATCH_PATTERNS)
+    expected = next((f"_{i}" for i, p in enumerate(FIRST_MATCH_PATTERNS) if p.search(s)), None)
+    match = pattern.match(s) if pattern else None
+
+    assert (match and match.lastgroup) == expected
+    assert make_first_match_pattern([re.compile(r"(a)\1")]) is None
+    assert make_first_match_pattern([]).match("a") is None
+
+
 def test_make_regex():
     # TODO
     ...
@@ -98,12 +166,29 @@ def test_get_method_name():
     ...
 
 
-def test_path_matches():
-    # TODO
-    ...
+def test_split_class_arguments():
+    assert split_class_arguments("Base, Generic[K, V], metaclass=Meta):\n    x = f(a, b)") == [
+        "Base",
+        "Generic[K, V]",
+        "metaclass=Meta",
+    ]
+    assert split_class_arguments("):\n    pass") == []
+
 
+def test_parse_base_classes():
+    assert parse_base_classes("class Plain:\n    def run(self, x: dict[str, Other]): ...") == []
+    assert parse_base_classes("class Child(Base):\n    x: dict[str, Other]\n") == ["Base"]
+    assert parse_base_classes("@dataclass\nclass Pair(abc.ABC, Generic[K, V]):\n    ...") == [
+        "ABC",
+        "Generic",
+    ]
+    assert parse_base_classes("class Model(Base, metaclass=Meta, **options):\n    ...") == ["Base"]
+    assert parse_base_classes(
+        "class Wide[T](\n    Base,  # the main one\n    Mixin[T],\n    total=False,\n):\n    ..."
+    ) == ["Base", "Mixin"]
 
-def test_path_matches_not():
+
+def test_path_matches():
     # TODO
     ...
 
@@ -146,9 +231,12 @@ class TestColor:
         ...
 
 
-def test_make_colorize_path():
-    # TODO
-    ...
+def test_make_colorize_path(tmp_path):
+    colorize_path = make_colorize_path(tmp_path / "docs", tmp_path)
+
+    assert colorize_path("docs/mod.md:Class") == (
+        "docs/\u001b[36mmod.md\u001b[0m:\u001b[31mClass\u001b[0m"
+    )
 
 
 def test_make_double_bar():
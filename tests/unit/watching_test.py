@@ -0,0 +1,100 @@
+import os
+from dataclasses import replace
+
+from archlint.collection import Project
+from archlint.configuration import get_config
+from archlint.watching import (
+    diff_snapshots,
+    find_changed_inputs,
+    run_affected_checks,
+    take_snapshot,
+    watch_project,
+)
+
+
+def test_take_snapshot(mini_project):
+    snapshot = take_snapshot(get_config(mini_project))
+    assert {p.relative_to(mini_project).as_posix() for p in snapshot} == {
+        "pyproject.toml",
+        "src/archlint/mod.py",
+        "tests/unit/mod_test.py",
+        "docs/md/mod.md",
+    }
+
+
+def test_diff_snapshots(tmp_path):
+    a, b, c = tmp_path / "a", tmp_path / "b", tmp_path / "c"
+    old = {a: (1, 1), b: (1, 1)}
+    new = {a: (1, 1), b: (2, 1), c: (1, 1)}
+    assert diff_snapshots(old, new) == {b, c}
+    assert diff_snapshots(new, old) == {b, c}
+    assert diff_snapshots(old, old) == set()
+
+
+def test_find_changed_inputs(mini_project):
+    cfg = get_config(mini_project)
+    assert find_changed_inputs(cfg, [mini_project / "src/archlint/mod.py"]) == {"source"}
+    assert find_changed_inputs(
+        cfg, [mini_project / "docs/md/mod.md", mini_project / "tests/unit/mod_test.py"]
+    ) == {"docs", "tests"}
+    assert find_changed_inputs(cfg, [mini_project / "pyproject.toml"]) == {"config"}
+    assert find_changed_inputs(cfg, [mini_project / "README.md"]) == set()
+
+
+def test_run_affected_checks(mini_project):
+    project = Project(get_config(mini_project))
+    checks = {name: (lambda _, name=name: (name, False)) for name in ("methods", "docs", "tests")}
+    docs_objects = project.docs
+
+    assert run_affected_checks(project, checks, {"docs"}) == [("docs", False)]
+    assert project.docs is not docs_objects
+    assert run_affected_checks(project, checks, {"tests"}) == [("tests", False)]
+    assert run_affected_checks(project, checks, {"source"}) == [
+        ("methods", False),
+        ("docs", False),
+        ("tests", False),
+    ]
+    assert len(run_affected_checks(project, checks, {"config"})) == 3
+
+
+def test_watch_project(mini_project):
+    project = Project(get_config(mini_project))
+    doc_file = mini_project / "docs/md/mod.md"
+    lines: list[str] = []
+    checks = {
+        "methods": lambda p: (f"methods: {len(p.source.functions)}", False),
+        "docs": lambda p: (f"docs: {len(p.docs.functions)}", False),
+    }
+
+    def echo(line: str) -> None:
+        lines.append(line)
+        if len(lines) == 1:
+            doc_file.write_text("## ::: archlint.mod.helper\n## ::: archlint.mod.other\n")
+            os.utime(doc_file, ns=(1_000_000_000, 1_000_000_000))
+
+    watch_project(project, lambda: project, checks, interval=0, echo=echo, max_polls=2)
+    assert lines[:2] == ["methods: 1", "docs: 1"]
+    assert "1 changed" in lines[2]
+    assert lines[3:] == ["docs: 2"]
+
+    # after a reload, the tree is watched as the new configuration sees it
+    cfg = get_config(mini_project)
+    (other_docs := mini_project / "docs/other").mkdir()
+    (other_docs / "mod.md").write_text("## ::: archlint.mod.helper\n")
+    reloaded = Project(replace(cfg, docs=replace(cfg.docs, md_dir=other_docs)))
+    pyproject = mini_project / "pyproject.toml"
+    lines.clear()
+
+    def echo_reload(line: str) -> None:
+        lines.append(line)
+        if len(lines) == 2:
+            pyproject.write_text(pyproject.read_text() + "\n")
+        elif len(lines) == 5:  # the reloaded project has reported
+            (other_docs / "new.md").write_text("## ::: archlint.mod.other\n")
+
+    watch_project(project, lambda: reloaded, checks, interval=0, echo=echo_reload, max_polls=3)
+    assert [line.split("] ")[1].split(",")[0] for line in lines if "changed" in line] == [
+        "1 changed",
+        "1 changed",
+    ]
+    assert lines[-1] == "docs: 2"